@@ -2,37 +2,57 @@ from phi.agent import Agent
 from phi.model.groq import Groq
 from dotenv import load_dotenv
 import os
-import requests
 import json
 import io
-from pypdf import PdfReader
+from .services import pocketbase_client as pbc
+from .services.file_text_cache import file_text_cache
 
 load_dotenv()
 
-PB_URL = "http://127.0.0.1:8090"
+# Cap on records returned to the LLM by one tool call
+TOOL_MAX_RECORDS = int(os.getenv("TOOL_MAX_RECORDS", "200"))
+# Characters of file text handed to the LLM (keeps tool output within token limits)
+FILE_TEXT_MAX_CHARS = int(os.getenv("FILE_TEXT_MAX_CHARS", "5000"))
 
-def get_collection_data(collection: str, filter_str: str = "") -> str:
+def get_collection_data(collection: str, filter_str: str = "", fields: str = "") -> str:
     """
     Fetches data from a PocketBase collection.
     Args:
         collection (str): The name of the collection (e.g., 'projects', 'resumes', 'contacts').
         filter_str (str): Optional filter string (e.g., 'category="Gen AI"').
+        fields (str): Optional comma separated fields to return (e.g., 'id,project_name,tech_stack'). Use it to keep results small.
     Returns:
-        str: JSON string of the results.
+        str: Compact JSON string of the results.
     """
     try:
-        url = f"{PB_URL}/api/collections/{collection}/records"
-        params = {"perPage": 50}
-        if filter_str:
-            params["filter"] = filter_str
-        
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return json.dumps(data.get("items", []), indent=2)
+        records = pbc.iter_records(collection, filter_str=filter_str or None, fields=fields or None, limit=TOOL_MAX_RECORDS)
+        return pbc.to_compact_json([pbc.strip_system_fields(r) for r in records])
     except Exception as e:
         return f"Error fetching data: {str(e)}"
 
+def extract_pdf_text(data: bytes, max_chars: int):
+    """
+    Extracts text page by page, stopping once max_chars is reached.
+    Returns:
+        tuple: (text, pages_read, complete) where complete means text is the whole document.
+    """
+    from pypdf import PdfReader # Only needed once a PDF is actually read
+    reader = PdfReader(io.BytesIO(data))
+    parts = []
+    size = 0
+    pages_read = 0
+    for page in reader.pages:
+        page_text = (page.extract_text() or "") + "\n"
+        parts.append(page_text)
+        size += len(page_text)
+        pages_read += 1
+        if size >= max_chars:
+            break
+    text = "".join(parts)
+    # Complete only if every page was read and nothing was cut to fit max_chars
+    complete = pages_read == len(reader.pages) and len(text) <= max_chars
+    return text[:max_chars], pages_read, complete
+
 def read_file_content(collection: str, record_id: str, filename: str) -> str:
     """
     Reads the text content of a PDF file from PocketBase.
@@ -43,34 +63,41 @@ def read_file_content(collection: str, record_id: str, filename: str) -> str:
     Returns:
         str: Extracted text from the file.
     """
-    try:
-        url = f"{PB_URL}/api/files/{collection}/{record_id}/{filename}"
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        # Process PDF
-        if filename.lower().endswith('.pdf'):
-            with io.BytesIO(response.content) as f:
-                reader = PdfReader(f)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                return text[:5000] # Limit text to avoid token limits
-        
+    if not filename.lower().endswith('.pdf'):
         return "Error: Unsupported file format (only PDF supported currently)."
+    try:
+        # `updated` changes whenever the file is replaced, so it versions the cache key
+        record = pbc.get_record(collection, record_id, fields="updated")
+        key = file_text_cache.make_key(collection, record_id, filename, record.get("updated"))
+        cached = file_text_cache.get(key, FILE_TEXT_MAX_CHARS)
+        if cached is not None:
+            return cached
+
+        response = pbc.get_file(collection, record_id, filename)
+        text, pages_read, complete = extract_pdf_text(response.content, FILE_TEXT_MAX_CHARS)
+        file_text_cache.put(key, text, pages_read, complete)
+        return text
     except Exception as e:
         return f"Error reading file: {str(e)}"
 
-from phi.storage.agent.sqlite import SqlAgentStorage
+from phi.model.message import Message
+from .services import http_client
+from .services.chat_history import chat_history
+from .preprocess import estimate_tokens
+from . import telemetry
 
-# ... (existing imports and functions)
+# Model that folds old chat turns into the rolling summary (see services/chat_history.py)
+CHAT_SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL", "llama-3.1-8b-instant")
 
 def get_job_os_agent():
-    # Define storage for persistent memory
-    storage = SqlAgentStorage(table_name="agent_sessions", db_file="brain.db")
-    
+    """
+    Builds the chat agent. It keeps no history of its own: the caller passes
+    the session's summary and recent turns (see build_chat_messages), so one
+    agent per request is cheap and sessions never share state.
+    """
     return Agent(
-        model=Groq(id="llama-3.3-70b-versatile", api_key=os.getenv("GROQ_API_KEY")),
+        model=Groq(id="llama-3.3-70b-versatile", api_key=os.getenv("GROQ_API_KEY"),
+                   client_params=http_client.SDK_CLIENT_PARAMS),
         instructions=[
             "You are the JobOs Intelligent Assistant. Answer based on PocketBase data.",
             "Collections: 'projects', 'resumes', 'cvs', 'placement_agencies', 'recruiters', 'certifications'.",
@@ -82,8 +109,70 @@ def get_job_os_agent():
         ],
         tools=[get_collection_data, read_file_content],
         show_tool_calls=False,
-        add_history_to_messages=True,
         markdown=True,
-        storage=storage,  # Enable persistent storage
-        read_chat_history=True # Auto-read history from storage based on session_id
     )
+
+def build_chat_messages(summary: str, turns: list, message: str) -> list:
+    """
+    Messages for one chat run: the rolling summary, the recent turns and the new message.
+    Args:
+        summary (str): Summary of the turns older than the window ('' if none).
+        turns (list): [(user, assistant)] recent turns, oldest first.
+        message (str): The new user message.
+    Returns:
+        list: phi Messages, passed as Agent.run(messages=...).
+    """
+    messages = []
+    if summary:
+        messages.append(Message(role="system", content=f"Summary of the earlier conversation:\n{summary}"))
+    for user, assistant in turns:
+        messages.append(Message(role="user", content=user))
+        messages.append(Message(role="assistant", content=assistant))
+    messages.append(Message(role="user", content=message))
+    return messages
+
+def summarize_conversation(summary: str, turns: list, max_tokens: int) -> str:
+    """
+    Folds chat turns into the running summary with a small model.
+    Args:
+        summary (str): The summary so far ('' for the first batch).
+        turns (list): [(user, assistant)] turns to add, oldest first.
+        max_tokens (int): Rough length limit for the new summary.
+    Returns:
+        str: The updated summary.
+    """
+    agent = Agent(
+        model=Groq(id=CHAT_SUMMARY_MODEL, api_key=os.getenv("GROQ_API_KEY"),
+                   client_params=http_client.SDK_CLIENT_PARAMS),
+        description="You maintain a running summary of a chat between a user and the JobOs assistant.",
+        instructions=[
+            "Merge the new turns into the existing summary.",
+            "Keep facts, names, record ids, decisions and open questions; drop greetings and tables.",
+            f"Write plain text of at most {max_tokens * 3 // 4} words. Return only the summary.",
+        ],
+        markdown=False,
+    )
+    transcript = "\n".join(f"User: {user}\nAssistant: {assistant}" for user, assistant in turns)
+    prompt = f"EXISTING SUMMARY:\n{summary or '(none)'}\n\nNEW TURNS:\n{transcript}"
+    response = http_client.call_with_retry("api.groq.com", agent.run, prompt)
+    # Clip runaway output so the summary can't outgrow its budget
+    return (response.content or "").strip()[:max_tokens * 4]
+
+def stream_chat(message: str, session_id: str):
+    """
+    Answers one chat message, yielding the reply text as it streams.
+    The prompt carries the session's rolling summary and recent turns (not the
+    whole session), and the finished exchange is added to the history.
+    """
+    with telemetry.span("chat_history"):
+        summary, turns = chat_history.context(session_id)
+        messages = build_chat_messages(summary, turns, message)
+    parts = []
+    with telemetry.span("llm_chat", history_turns=len(turns)), http_client.guarded("api.groq.com"):
+        for chunk in get_job_os_agent().run(messages=messages, stream=True):
+            if chunk and isinstance(chunk.content, str):
+                parts.append(chunk.content)
+                yield chunk.content
+    reply = "".join(parts)
+    telemetry.record_tokens("chat", sum(estimate_tokens(m.content or "") for m in messages), estimate_tokens(reply))
+    chat_history.append(session_id, message, reply)
@@ -0,0 +1,71 @@
+import os
+import re
+
+CHUNK_MAX_CHARS = int(os.getenv("EXTRACT_CHUNK_CHARS", "12000"))
+CHUNK_OVERLAP_CHARS = int(os.getenv("EXTRACT_CHUNK_OVERLAP", "800"))
+
+# A new listing block starts at a heading, a horizontal rule or a list item
+BLOCK_START = re.compile(r'^\s*(?:#{1,6}\s|[-*_]{3,}\s*$|[-*+]\s|\d+\.\s)')
+
+def split_blocks(markdown: str) -> list:
+    """
+    Splits Markdown into listing-sized blocks on headings, rules, list items and blank lines.
+    """
+    blocks = []
+    current = []
+    for line in markdown.splitlines():
+        if not line.strip() or BLOCK_START.match(line):
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            if not line.strip():
+                continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+def chunk_markdown(markdown: str, max_chars: int = CHUNK_MAX_CHARS, overlap: int = CHUNK_OVERLAP_CHARS) -> list:
+    """
+    Packs listing blocks into chunks of at most max_chars.
+    The trailing blocks of each chunk (up to `overlap` chars) are repeated at the start
+    of the next one, so a listing cut at a boundary is still seen whole once.
+    
+    Returns:
+        list: Chunk strings. A page that fits in one chunk is returned unchanged.
+    """
+    if len(markdown) <= max_chars:
+        return [markdown]
+
+    blocks = []
+    for block in split_blocks(markdown):
+        # Oversized blocks (e.g. one giant table) are hard-split on line boundaries
+        while len(block) > max_chars:
+            cut = block.rfind("\n", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            blocks.append(block[:cut])
+            block = block[cut:].lstrip("\n")
+        if block:
+            blocks.append(block)
+
+    chunks = []
+    current = []
+    size = 0
+    for block in blocks:
+        if current and size + len(block) + 1 > max_chars:
+            chunks.append("\n\n".join(current))
+            carried = []
+            carried_size = 0
+            for prev in reversed(current):
+                if carried_size + len(prev) > overlap:
+                    break
+                carried.insert(0, prev)
+                carried_size += len(prev) + 2
+            current, size = carried, carried_size
+            if size + len(block) > max_chars:
+                current, size = [], 0
+        current.append(block)
+        size += len(block) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
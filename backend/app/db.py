@@ -0,0 +1,20 @@
+import os
+import sqlite3
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+
+def db_path(filename: str) -> str:
+    """
+    Resolves a SQLite file name to the backend directory (next to brain.db).
+    """
+    return filename if os.path.isabs(filename) else os.path.join(BACKEND_DIR, filename)
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite connection that can be shared across worker threads.
+    Callers must serialise writes with their own lock.
+    """
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
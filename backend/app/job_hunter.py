@@ -1,35 +1,90 @@
 from phi.agent import Agent
 from phi.model.groq import Groq
 import os
-import requests
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from .reporting import generate_job_report
+from .services.scrape_cache import get_scrape_cache
+from .services import http_client
+from .services.extraction_cache import ExtractionCache, parser_signature
+from .source_parsers import parse_listing_page
+from .chunking import chunk_markdown
+from .services.job_index import get_job_index
+from .ranking import rank_jobs
+from .json_stream import JSONArrayStream
+from .preprocess import preprocess_page
+from .model_router import ModelRouter
+from . import schemas
+from . import telemetry
 
 load_dotenv()
 
-def get_job_parser_agent():
+# Hunt engine tuning (override via env)
+HUNT_CONCURRENCY = int(os.getenv("HUNT_CONCURRENCY", "4"))
+HUNT_MAX_TARGETS = int(os.getenv("HUNT_MAX_TARGETS", "8"))
+SCRAPE_MAX_CHARS = int(os.getenv("SCRAPE_MAX_CHARS", "200000"))
+JINA_READER_URL = os.getenv("JINA_READER_URL", "https://r.jina.ai")
+EXTRACT_CHUNK_CONCURRENCY = int(os.getenv("EXTRACT_CHUNK_CONCURRENCY", "3"))
+HUNT_STAGGER_SECONDS = float(os.getenv("HUNT_STAGGER_SECONDS", "1.5"))
+
+PARSER_MODEL_ID = "llama-3.3-70b-versatile"
+# Model routing: a small, fast model extracts first and the large model only sees chunks it got wrong
+EXTRACT_ROUTING = os.getenv("EXTRACT_ROUTING", "true").lower() == "true"
+EXTRACT_SMALL_MODEL_ID = os.getenv("EXTRACT_SMALL_MODEL", "llama-3.1-8b-instant")
+EXTRACT_MAX_INVALID = float(os.getenv("EXTRACT_MAX_INVALID", "0.2"))  # Share of schema-invalid jobs that triggers escalation
+EXTRACT_MIN_YIELD = float(os.getenv("EXTRACT_MIN_YIELD", "0.5"))      # Escalate when jobs < this share of the estimated listings
+EXTRACT_MIN_LISTINGS = int(os.getenv("EXTRACT_MIN_LISTINGS", "3"))    # ...on chunks that seem to hold at least this many
+PARSER_DESCRIPTION = "You are an expert Job Hunter. Your goal is to extract structured job data."
+PARSER_INSTRUCTIONS = [
+    "You will be given Markdown content of a job search page.",
+    "Extract valid job listings.",
+    "For each job, extract: 'title', 'company', 'location', 'link', 'summary' (20 words max), and 'source' (e.g. LinkedIn, YC).",
+    "CRITICAL: Output ONLY a valid JSON list of objects. Do not write markdown blocks or text.",
+    "Example: [{'title': '...', 'company': '...', ...}]",
+    "If no jobs found, output an empty list: []"
+]
+# Per-chunk user prompt (str.format fields: role, location, chunk)
+EXTRACT_PROMPT = """
+    Extract job listings from this content matching role='{role}' and location='{location}'.
+    Content:
+    {chunk}
+    """
+
+def get_job_parser_agent(model_id: str = PARSER_MODEL_ID):
     return Agent(
-        model=Groq(id="llama-3.3-70b-versatile", api_key=os.getenv("GROQ_API_KEY")),
-        description="You are an expert Job Hunter. Your goal is to extract structured job data.",
-        instructions=[
-            "You will be given Markdown content of a job search page.",
-            "Extract valid job listings.",
-            "For each job, extract: 'title', 'company', 'location', 'link', 'summary' (20 words max), and 'source' (e.g. LinkedIn, YC).",
-            "CRITICAL: Output ONLY a valid JSON list of objects. Do not write markdown blocks or text.",
-            "Example: [{'title': '...', 'company': '...', ...}]",
-            "If no jobs found, output an empty list: []"
-        ],
+        model=Groq(id=model_id, api_key=os.getenv("GROQ_API_KEY"),
+                   client_params=http_client.SDK_CLIENT_PARAMS),
+        description=PARSER_DESCRIPTION,
+        instructions=PARSER_INSTRUCTIONS,
         show_tool_calls=False,
         markdown=False # We want raw text (JSON)
     )
 
-def scrape_with_jina(target_url: str) -> str:
+extraction_router = ModelRouter(
+    "extract",
+    [("small", EXTRACT_SMALL_MODEL_ID), ("large", PARSER_MODEL_ID)] if EXTRACT_ROUTING else [("large", PARSER_MODEL_ID)],
+    get_job_parser_agent,
+)
+
+# Parsed job lists are reused while page content and the parser prompt/models are unchanged
+extraction_cache = ExtractionCache(
+    parser_signature(extraction_router.signature, PARSER_DESCRIPTION, PARSER_INSTRUCTIONS, EXTRACT_PROMPT)
+)
+
+def scrape_with_jina(target_url: str, use_cache: bool = True) -> str:
     """
     Uses Jina.ai Reader API to turn a URL into LLM-friendly Markdown.
+    Responses are served from the on-disk scrape cache when fresh (see services/scrape_cache.py).
     """
+    if use_cache:
+        return get_scrape_cache().get_or_fetch(target_url, _fetch_from_jina)
+    return _fetch_from_jina(target_url)
+
+def _fetch_from_jina(target_url: str) -> str:
     try:
-        api_url = f"https://r.jina.ai/{target_url}"
+        api_url = f"{JINA_READER_URL}/{target_url}"
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
@@ -38,10 +93,10 @@ def scrape_with_jina(target_url: str) -> str:
             headers["Authorization"] = f"Bearer {jina_key}"
 
         print(f"   [Scraper] Fetching: {target_url} via Jina...")
-        response = requests.get(api_url, headers=headers, timeout=25)
+        response = http_client.request("GET", api_url, headers=headers, timeout=25)
         
         if response.status_code == 200:
-            return response.text[:20000] # Increased limit for more jobs
+            return response.text[:SCRAPE_MAX_CHARS] # Full page; extraction chunks it
         elif response.status_code == 401:
             return "Error: 401 Unauthorized"
         else:
@@ -49,22 +104,16 @@ def scrape_with_jina(target_url: str) -> str:
     except Exception as e:
         return f"Error connecting to scraper: {str(e)}"
 
-def run_job_hunt(preferences: dict = None):
+def build_targets(preferences: dict) -> list:
     """
-    Executes the job hunt based on preferences.
-    preferences = { 'role': '...', 'experience': '...', 'location': '...', 'skills': [...] }
+    Builds the list of search URLs to scrape for the given preferences.
     """
-    print("🏹 JobOs Hunter: Starting Enhanced Hunt...")
-    if not preferences:
-        preferences = {"role": "Generative AI", "location": "Remote", "experience": "Any"}
-
-    agent = get_job_parser_agent()
     role_encoded = preferences.get('role', 'Software Engineer').replace(' ', '%20')
     loc_encoded = preferences.get('location', '').replace(' ', '%20')
     
     # EXPANDED TARGET LIST (10+ Sources logic)
     # We construct URLs dynamically based on the role where possible
-    targets = [
+    return [
         # 1. YCombinator
         f"https://www.ycombinator.com/jobs?role=Software%20Engineer&q={role_encoded}",
         # 2. RemoteOK
@@ -86,51 +135,338 @@ def run_job_hunt(preferences: dict = None):
         # 10. Naukri (India focus)
         f"https://www.naukri.com/{role_encoded.lower()}-jobs"
     ]
+
+def _job_key(job: dict):
+    return job.get('link') or (job.get('title', '').lower(), job.get('company', '').lower())
+
+def merge_jobs(batches: list) -> list:
+    """
+    Merges job lists from overlapping chunks, keeping the first copy of each job
+    (by link, or title+company when the link is missing).
+    """
+    merged = {}
+    for batch in batches:
+        for job in batch:
+            if isinstance(job, dict):
+                merged.setdefault(_job_key(job), job)
+    return list(merged.values())
+
+def check_extraction(raw_output: str, chunk: str, base_url: str = None):
+    """
+    Router check for one chunk's output: parses and schema-validates the jobs and
+    flags output worth escalating (too many invalid jobs, or far fewer jobs than
+    the chunk seems to list).
+
+    Returns:
+        tuple: (jobs, problem) with problem None when the output is acceptable.
+    """
+    jobs, rejected = schemas.parse_job_list(raw_output, base_url)
+    if rejected and rejected > EXTRACT_MAX_INVALID * (len(jobs) + rejected):
+        return jobs, f"{rejected}/{len(jobs) + rejected} jobs failed validation"
+    expected = schemas.estimate_listings(chunk)
+    if expected >= EXTRACT_MIN_LISTINGS and len(jobs) < EXTRACT_MIN_YIELD * expected:
+        return jobs, f"low yield ({len(jobs)} jobs, ~{expected} listings)"
+    return jobs, None
+
+def extract_chunk(chunk: str, preferences: dict, on_jobs=None, url: str = None) -> list:
+    """
+    Extracts one chunk of scraped Markdown through the model router (small model
+    first, large model when the output fails check_extraction).
+    Unchanged chunks are answered from the extraction cache without a model call;
+    only output that passed the check is cached.
+    When on_jobs is given the model output is streamed, and on_jobs(jobs) is called
+    with each schema-valid job as soon as it is complete (jobs already sent from a
+    tier that was escalated are not repeated).
+    
+    Raises:
+        ValueError: If no tier returned a JSON list (nothing is cached).
+    """
+    cache_key = extraction_cache.make_key(chunk, preferences.get('role'), preferences.get('location'))
+    cached = extraction_cache.get(cache_key)
+    if cached is not None:
+        print(f"    [ExtractCache] Hit ({len(cached)} jobs), skipping LLM.")
+        if on_jobs and cached:
+            on_jobs(cached)
+        return cached
+
+    prompt = EXTRACT_PROMPT.format(role=preferences.get('role'), location=preferences.get('location'), chunk=chunk)
+    on_text = None
+    if on_jobs:
+        streams = {}
+        emitted = set()
+
+        def on_text(tier, text):
+            completed = streams.setdefault(tier, JSONArrayStream()).feed(text)
+            if not completed:
+                return
+            fresh = []
+            for job in schemas.validate_jobs(completed, url)[0]:
+                if _job_key(job) not in emitted:
+                    emitted.add(_job_key(job))
+                    fresh.append(job)
+            if fresh:
+                on_jobs(fresh)
+
+    jobs, _, accepted = extraction_router.run(
+        prompt, lambda raw_output: check_extraction(raw_output, chunk, url), on_text, stage="llm_extract"
+    )
+    if accepted: # A fallback (every tier flagged) is retried on the next run instead
+        extraction_cache.put(cache_key, jobs)
+    return jobs
+
+def extract_jobs(content: str, preferences: dict, url: str = None, on_jobs=None, stats: dict = None) -> list:
+    """
+    Turns scraped Markdown into a job list.
+    Known sources are parsed deterministically (see source_parsers.py); the parser
+    agent is only used when no parser matches or it finds nothing. Long pages are
+    split on listing boundaries and the chunks are extracted in parallel, then merged.
+    on_jobs(jobs) is called with jobs as they are found (see extract_chunk).
+    Pages sent to the LLM are stripped of boilerplate first; the before/after token
+    estimates are written to `stats` when given.
     
-    all_jobs = []
+    Raises:
+        ValueError: If every chunk failed to extract.
+    """
+    if url:
+        with telemetry.span("source_parser"):
+            parsed = parse_listing_page(url, content)
+        if parsed:
+            print(f"    [Parser] {parsed[0]['source']}: parsed {len(parsed)} jobs without LLM.")
+            if on_jobs:
+                on_jobs(parsed)
+            return parsed
+
+    with telemetry.span("preprocess"):
+        cleaned, token_stats = preprocess_page(content)
+    saved = 100 - (100 * token_stats["tokens_after"] // max(token_stats["tokens_before"], 1))
+    print(f"    [Preprocess] ~{token_stats['tokens_before']} -> ~{token_stats['tokens_after']} tokens (-{saved}%)")
+    if stats is not None:
+        stats.update(token_stats)
+    if not cleaned.strip():
+        return []
+
+    chunks = chunk_markdown(cleaned)
+    if len(chunks) == 1:
+        return extract_chunk(chunks[0], preferences, on_jobs, url)
+
+    print(f"    [Chunker] {len(cleaned)} chars -> {len(chunks)} chunks")
+    batches = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(EXTRACT_CHUNK_CONCURRENCY, len(chunks)), thread_name_prefix="extract") as pool:
+        futures = [pool.submit(telemetry.bind(extract_chunk), chunk, preferences, on_jobs, url) for chunk in chunks]
+        for future in futures:
+            try:
+                batches.append(future.result())
+            except Exception as e:
+                errors.append(e)
+    if errors and not batches:
+        raise errors[0]
+    if errors:
+        print(f"    [Chunker] {len(errors)}/{len(chunks)} chunks failed: {errors[0]}")
+    return merge_jobs(batches)
+
+def process_target(url: str, preferences: dict, progress=None):
+    """
+    Scrapes a single target and extracts its jobs as soon as the page arrives.
+    Each extraction builds its own parser agent, since agents keep per-run state.
+    progress(event, **data) receives target_started, scrape_done and jobs events.
+    
+    Returns:
+        tuple: (jobs, timing) where timing = {url, status, scrape_s, extract_s, jobs}
+    """
+    timing = {"url": url, "status": "ok", "scrape_s": 0.0, "extract_s": 0.0, "jobs": 0}
+    emit = progress or (lambda event, **data: None)
+    print(f" -> Processing Target: {url}")
+    emit("target_started", url=url)
     
-    for url in targets[:8]: # Limit to 8 targets per run to save time/tokens for now, or loop all
-        print(f" -> Processing Target: {url}")
+    started = time.perf_counter()
+    with telemetry.span("scrape"):
         content = scrape_with_jina(url)
-        
-        if "Error" in content:
-             print(f"    Skipping: {content}")
-             continue
+    timing["scrape_s"] = round(time.perf_counter() - started, 3)
+    
+    # Scraper failures come back as "Error..." strings; a page merely mentioning "Error" is fine
+    if content.startswith("Error"):
+        print(f"    Skipping: {content}")
+        timing["status"] = "scrape_error"
+        emit("scrape_done", url=url, ok=False, error=content, scrape_s=timing["scrape_s"])
+        return [], timing
+    emit("scrape_done", url=url, ok=True, chars=len(content), scrape_s=timing["scrape_s"])
 
-        try:
-             # Extract structured data
-             prompt = f"""
-             Extract job listings from this content matching role='{preferences.get('role')}' and location='{preferences.get('location')}'.
-             Content:
-             {content[:15000]}
-             """
-             response = agent.run(prompt)
-             
-             # Parse JSON safety
-             raw_json = response.content.replace("```json", "").replace("```", "").strip()
-             if raw_json.startswith("["):
-                 batch_jobs = json.loads(raw_json)
-                 print(f"    Found {len(batch_jobs)} jobs.")
-                 all_jobs.extend(batch_jobs)
-             else:
-                 print("    Agent did not return valid JSON.")
-                 
-        except Exception as e:
-             print(f"    Error parsing {url}: {e}")
-
-    # Deduplicate by link
-    unique_jobs = {job['link']: job for job in all_jobs if 'link' in job}.values()
-    final_list = list(unique_jobs)
+    started = time.perf_counter()
+    try:
+        on_jobs = (lambda jobs: emit("jobs", url=url, count=len(jobs), jobs=jobs)) if progress else None
+        with telemetry.span("extract"):
+            batch_jobs = extract_jobs(content, preferences, url, on_jobs, stats=timing)
+        print(f"    Found {len(batch_jobs)} jobs.")
+    except Exception as e:
+        print(f"    Error parsing {url}: {e}")
+        batch_jobs = []
+        timing["status"] = "extract_error"
+    timing["extract_s"] = round(time.perf_counter() - started, 3)
+    timing["jobs"] = len(batch_jobs)
+    return batch_jobs, timing
+
+def load_portfolio_for_ranking():
+    """
+    Portfolio context for ranking; ranking still works on preferences alone if PocketBase is down.
+    """
+    try:
+        from .resume_agent import fetch_user_portfolio
+        return fetch_user_portfolio()
+    except Exception as e:
+        print(f"    [Ranking] Portfolio unavailable, ranking on preferences only: {e}")
+        return None
+
+def collect_jobs(targets: list, preferences_for, concurrency: int = None, progress=None, stagger_s: float = 0):
+    """
+    Scrapes and extracts every target URL on a bounded pool.
+    preferences_for(url) returns the preferences used to extract that URL.
+    Submissions are spaced by stagger_s seconds to avoid bursts on shared hosts.
     
-    print(f"✅ Hunt Complete. Total Unique Jobs: {len(final_list)}")
+    Returns:
+        tuple: (jobs_by_url, timings) with timings in target order.
+    """
+    emit = progress or (lambda event, **data: None)
+    workers = max(1, min(concurrency or HUNT_CONCURRENCY, len(targets) or 1))
+    emit("hunt_started", targets=len(targets), workers=workers)
+    
+    jobs_by_url = {}
+    timings = []
+    hunt_started = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hunter") as pool:
+        futures = {}
+        for i, url in enumerate(targets):
+            if stagger_s and i:
+                time.sleep(stagger_s)
+            futures[pool.submit(telemetry.bind(process_target), url, preferences_for(url), progress)] = url
+        for future in as_completed(futures):
+            batch_jobs, timing = future.result()
+            jobs_by_url[futures[future]] = batch_jobs
+            timings.append(timing)
+            emit("target_done", done=len(timings), total=len(targets), **timing)
+
+    # Report timings in target order
+    order = {url: i for i, url in enumerate(targets)}
+    timings.sort(key=lambda t: order[t["url"]])
+    for t in timings:
+        tokens = f" tokens=~{t['tokens_before']}->~{t['tokens_after']}" if "tokens_before" in t else ""
+        print(f"   [Timing] {t['url']}: scrape={t['scrape_s']}s extract={t['extract_s']}s jobs={t['jobs']}{tokens} ({t['status']})")
+    print(f"   [Timing] Total wall clock: {time.perf_counter() - hunt_started:.2f}s ({workers} workers)")
+    print(f"   [ScrapeCache] {get_scrape_cache().get_stats()}")
+    print(f"   [ExtractCache] {extraction_cache.get_stats()}")
+    return jobs_by_url, timings
+
+def finalize_hunt(all_jobs: list, preferences: dict, run_id: str, new_only: bool, timings: list,
+                  portfolio: dict = None, progress=None):
+    """
+    Dedups a profile's jobs against the job index, ranks them and generates the report.
+    Returns the run_job_hunt result dict.
+    """
+    emit = progress or (lambda event, **data: None)
+
+    # Deduplicate by normalized link + fuzzy title/company fingerprint, across runs
+    with telemetry.span("dedup"):
+        unique_jobs, new_jobs = get_job_index().record(all_jobs, run_id)
+    final_list = new_jobs if new_only else unique_jobs
+    emit("dedup", raw=len(all_jobs), unique=len(unique_jobs), new=len(new_jobs), duplicates=len(all_jobs) - len(unique_jobs))
+    
+    print(f"✅ Hunt Complete ({preferences.get('role')}). Total Unique Jobs: {len(unique_jobs)} ({len(new_jobs)} new since last hunt)")
+
+    # Rank against skills/role/location and the portfolio's tech stacks
+    with telemetry.span("rank"):
+        final_list = rank_jobs(final_list, preferences, portfolio, preferences.get('top_n'))
     
     # Generate Report
+    emit("hunt_complete", reported=len(final_list))
     if final_list:
+        emit("generating_report")
         report_meta = generate_job_report(final_list, preferences)
         return {
             "status": "success", 
             "results": final_list, 
-            "report": report_meta
+            "report": report_meta,
+            "new_jobs": len(new_jobs),
+            "timings": timings
         }
     else:
-        return {"status": "no_jobs_found", "results": []}
+        return {"status": "no_jobs_found", "results": [], "new_jobs": 0, "timings": timings}
+
+def run_job_hunt(preferences: dict = None, concurrency: int = None, new_only: bool = False, progress=None):
+    """
+    Executes the job hunt based on preferences.
+    preferences = { 'role': '...', 'experience': '...', 'location': '...', 'skills': [...] }
+    
+    Targets are scraped concurrently (at most `concurrency` at a time, default
+    HUNT_CONCURRENCY) and each page is handed to the parser agent as soon as it arrives.
+    Jobs are deduplicated against the persistent job index; with new_only=True the
+    report only contains jobs first seen in this run.
+    progress(event, **data) receives hunt progress events when given.
+    """
+    print("🏹 JobOs Hunter: Starting Enhanced Hunt...")
+    if not preferences:
+        preferences = {"role": "Generative AI", "location": "Remote", "experience": "Any"}
+
+    targets = build_targets(preferences)[:HUNT_MAX_TARGETS] # Limit targets per run to save time/tokens
+    with telemetry.trace_run("hunt", role=preferences.get('role'), targets=len(targets)):
+        run_id = get_job_index().start_run()
+        jobs_by_url, timings = collect_jobs(targets, lambda url: preferences, concurrency, progress)
+        all_jobs = [job for url in targets for job in jobs_by_url.get(url, [])]
+        try:
+            return finalize_hunt(all_jobs, preferences, run_id, new_only, timings, load_portfolio_for_ranking(), progress)
+        finally:
+            get_job_index().finish_run(run_id)
+
+def run_profile_hunts(profiles: list, concurrency: int = None, stagger_s: float = None, new_only: bool = True) -> list:
+    """
+    Hunts for many saved preference profiles in one window.
+    Identical target URLs are scraped and extracted once and their jobs are shared
+    by every profile that asked for them; each profile is then deduped, ranked and
+    reported on its own. All scraping shares one pool capped at `concurrency`
+    (default HUNT_CONCURRENCY), with submissions staggered by `stagger_s` seconds.
+    
+    Returns:
+        list: [{"profile": <profile>, "result": <run_job_hunt-style result>}, ...]
+    """
+    if not profiles:
+        return []
+    stagger_s = HUNT_STAGGER_SECONDS if stagger_s is None else stagger_s
+    print(f"🏹 JobOs Hunter: Multi-profile hunt for {len(profiles)} profiles...")
+
+    # 1. Coalesce targets across profiles
+    targets_by_profile = [build_targets(p)[:HUNT_MAX_TARGETS] for p in profiles]
+    owners = {}
+    for i, targets in enumerate(targets_by_profile):
+        for url in targets:
+            owners.setdefault(url, []).append(i)
+    unique_targets = list(owners)
+    print(f"   [Coalesce] {sum(len(t) for t in targets_by_profile)} profile targets -> {len(unique_targets)} unique URLs")
+
+    def preferences_for(url):
+        # Shared pages are extracted once with the first owner's role; location is
+        # only kept when every owner agrees, ranking handles it per profile otherwise.
+        sharing = [profiles[i] for i in owners[url]]
+        locations = {p.get('location', '') for p in sharing}
+        return {**sharing[0], "location": locations.pop() if len(locations) == 1 else ""}
+
+    with telemetry.trace_run("profile_hunts", profiles=len(profiles), targets=len(unique_targets)):
+        # 2. Scrape + extract every unique URL once
+        run_id = get_job_index().start_run()
+        jobs_by_url, timings = collect_jobs(unique_targets, preferences_for, concurrency, stagger_s=stagger_s)
+
+        # 3. Fan jobs back out to each profile's ranking and report
+        portfolio = load_portfolio_for_ranking()
+        results = []
+        try:
+            for profile, targets in zip(profiles, targets_by_profile):
+                profile_jobs = [job for url in targets for job in jobs_by_url.get(url, [])]
+                profile_timings = [t for t in timings if t["url"] in set(targets)]
+                try:
+                    result = finalize_hunt(profile_jobs, profile, run_id, new_only, profile_timings, portfolio)
+                except Exception as e:
+                    print(f"    Error finishing hunt for profile {profile.get('name', profile.get('role'))}: {e}")
+                    result = {"status": "error", "error": str(e), "results": []}
+                results.append({"profile": profile, "result": result})
+        finally:
+            get_job_index().finish_run(run_id)
+        return results
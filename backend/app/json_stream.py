@@ -0,0 +1,233 @@
+import json
+
+class JSONArrayStream:
+    """
+    Incremental parser for a streamed JSON array of objects (e.g. LLM output).
+    feed() accepts text fragments and returns the objects completed so far, so
+    callers can act on each element before the closing ']' arrives.
+    Text before the first '[' (preamble, code fences) is ignored, and elements
+    with small syntax slips are fixed with repair_json().
+    """
+
+    def __init__(self):
+        self.depth = 0          # 0 = outside the array, 1 = inside it, 2+ = inside an element
+        self.in_string = False
+        self.escaped = False
+        self.quote = None
+        self.buffer = []        # characters of the element being read
+        self.closed = False
+
+    def feed(self, text: str) -> list:
+        completed = []
+        for ch in text:
+            if self.closed:
+                break
+            if self.depth >= 2:
+                self.buffer.append(ch)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == self.quote:
+                    self.in_string = False
+                continue
+            if ch in "\"'" and self.depth >= 2:
+                self.in_string = True
+                self.quote = ch
+            elif ch in "[{":
+                if self.depth == 0 and ch == "[":
+                    self.depth = 1
+                elif self.depth >= 1:
+                    if self.depth == 1:
+                        self.buffer = [ch]
+                    self.depth += 1
+            elif ch in "]}":
+                if self.depth == 1 and ch == "]":
+                    self.depth = 0
+                    self.closed = True
+                elif self.depth >= 2:
+                    self.depth -= 1
+                    if self.depth == 1:
+                        obj = self._decode("".join(self.buffer))
+                        if obj is not None:
+                            completed.append(obj)
+                        self.buffer = []
+        return completed
+
+    @staticmethod
+    def _decode(text: str):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+        try:
+            return json.loads(repair_json(text, "{"))
+        except ValueError:
+            return None
+
+# Python-style literals models sometimes emit instead of JSON ones
+PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+JSON_LITERALS = {"true", "false", "null"}
+BARE_TOKEN = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.+-")
+
+
+def _is_number(token: str) -> bool:
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+def repair_json(text: str, start: str = "[{") -> str:
+    """
+    Best-effort local repair of model JSON, so a slightly malformed or truncated
+    completion doesn't have to be generated again:
+
+    - preamble, code fences and text after the top-level value are dropped
+    - single-quoted strings, raw newlines in strings, Python literals and bare
+      words are turned into JSON
+    - trailing commas are removed and missing ones between values inserted
+    - truncated output is cut back to the last complete value (or array
+      element) and closed
+
+    Args:
+        text (str): Raw model output.
+        start (str): Characters that may open the top-level value.
+
+    Returns:
+        str: The repaired text (json.loads may still reject it).
+
+    Raises:
+        ValueError: If there is no JSON value in the text.
+    """
+    text = text.replace("```json", "").replace("```", "")
+    positions = [i for i in (text.find(c) for c in start) if i != -1]
+    if not positions:
+        raise ValueError("No JSON value in the output.")
+    i = min(positions)
+
+    out = []
+    stack = []              # [closer, in_value] per open container
+    safe = None             # (len(out), closers) after the last complete value
+    in_string = False
+    quote = None
+    escaped = False
+    last = ""               # last token outside strings; 'v' = end of a value
+
+    def value_done():
+        nonlocal safe, last
+        last = "v"
+        closers = [closer for closer, _ in stack]
+        # Objects inside arrays are only kept whole (no job without its link)
+        in_element = "]" in closers and "}" in closers[closers.index("]"):]
+        if stack and (stack[-1][0] == "]" or stack[-1][1]) and not in_element:
+            safe = (len(out), closers)
+
+    def begin_value():
+        if last == "v":
+            out.append(",")
+
+    while i < len(text):
+        ch = text[i]
+        i += 1
+        if in_string:
+            if escaped:
+                escaped = False
+                out.append(ch if ch == "'" else "\\" + ch)
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                in_string = False
+                out.append('"')
+                if stack and stack[-1][0] == "}" and not stack[-1][1]:
+                    last = "k"      # object key, the value follows
+                else:
+                    value_done()
+            elif ch == '"':
+                out.append('\\"')
+            elif ch in "\n\r\t":
+                out.append({"\n": "\\n", "\r": "\\r", "\t": "\\t"}[ch])
+            else:
+                out.append(ch)
+            continue
+
+        if ch in "\"'":
+            begin_value()
+            in_string = True
+            quote = ch
+            out.append('"')
+        elif ch in "[{":
+            begin_value()
+            stack.append(["]" if ch == "[" else "}", False])
+            out.append(ch)
+            last = ch
+            if safe is None:
+                safe = (len(out), [closer for closer, _ in stack])
+        elif ch in "]}":
+            if not any(closer == ch for closer, _ in stack):
+                continue            # stray closer
+            while out and out[-1] in " \n\r\t,":
+                out.pop()
+            while stack:
+                closer, _ = stack.pop()
+                out.append(closer)
+                if closer == ch:
+                    break
+            if not stack:
+                return "".join(out)
+            value_done()
+        elif ch == ":":
+            if stack:
+                stack[-1][1] = True
+            out.append(ch)
+            last = ch
+        elif ch == ",":
+            if stack:
+                stack[-1][1] = False
+            if last not in ("v", "k"):
+                continue            # leading or doubled comma
+            out.append(ch)
+            last = ch
+        elif ch in BARE_TOKEN:
+            j = i
+            while j < len(text) and text[j] in BARE_TOKEN:
+                j += 1
+            token = text[i - 1:j]
+            i = j
+            begin_value()
+            if token in PY_LITERALS:
+                token = PY_LITERALS[token]
+            elif token not in JSON_LITERALS and not _is_number(token):
+                token = json.dumps(token)   # unquoted key or word
+            out.append(token)
+            if stack and stack[-1][0] == "}" and not stack[-1][1]:
+                last = "k"
+            else:
+                value_done()
+        elif ch in " \n\r\t":
+            out.append(ch)
+
+    # Truncated: keep everything up to the last complete value and close the rest
+    length, closers = safe
+    out = out[:length]
+    while out and out[-1] in " \n\r\t,":
+        out.pop()
+    return "".join(out) + "".join(reversed(closers))
+
+def loads_lenient(text: str, start: str = "[{"):
+    """
+    json.loads for model output, falling back to repair_json().
+
+    Returns:
+        tuple: (value, repaired) where repaired is True when the text needed fixing.
+
+    Raises:
+        ValueError: If the output can't be repaired into JSON.
+    """
+    clean = text.replace("```json", "").replace("```", "").strip()
+    try:
+        return json.loads(clean), False
+    except ValueError:
+        pass
+    return json.loads(repair_json(text, start)), True
@@ -0,0 +1,166 @@
+import os
+import time
+import uuid
+import socket
+import threading
+from .db import db_path, connect
+
+SCHEDULER_DB = db_path(os.getenv("SCHEDULER_DB", "scheduler.db"))
+LEASE_TTL = int(os.getenv("SCHEDULER_LEASE_TTL", "60"))
+# A run still marked 'running' after this long is assumed to have died with its worker
+RUN_STALE_AFTER = int(os.getenv("SCHEDULER_RUN_STALE_AFTER", str(3 * 3600)))
+
+_conn = None
+_conn_lock = threading.Lock()
+
+def _db():
+    global _conn
+    with _conn_lock:
+        if _conn is None:
+            _conn = connect(SCHEDULER_DB)
+            _conn.isolation_level = None # Explicit BEGIN IMMEDIATE below
+            _conn.execute(
+                """CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    acquired_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+            _conn.execute(
+                """CREATE TABLE IF NOT EXISTS scheduler_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    scheduled_for REAL NOT NULL,
+                    holder TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 1,
+                    catch_up INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    UNIQUE (job_id, scheduled_for)
+                )"""
+            )
+        return _conn
+
+def _transaction(fn):
+    """Runs fn(conn) inside BEGIN IMMEDIATE so competing processes serialise on the write lock."""
+    conn = _db()
+    with _conn_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class LeaderLease:
+    """
+    Time-bound leadership lease stored in SQLite, shared by every worker process
+    on the host. The holder renews it periodically; if it dies, the lease expires
+    and the next worker to try takes over.
+    """
+
+    def __init__(self, name: str = "scheduler", ttl: int = LEASE_TTL):
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._expires_at = 0.0
+
+    def try_acquire(self) -> bool:
+        """
+        Acquires or renews the lease. Returns True while this process is the leader.
+        """
+        def _acquire(conn):
+            now = time.time()
+            row = conn.execute("SELECT holder, expires_at FROM leases WHERE name = ?", (self.name,)).fetchone()
+            if row and row[0] != self.holder and row[1] > now:
+                return 0.0
+            acquired_at = now if not row or row[0] != self.holder else None
+            conn.execute(
+                """INSERT INTO leases (name, holder, acquired_at, expires_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at,
+                   acquired_at = COALESCE(?, leases.acquired_at)""",
+                (self.name, self.holder, now, now + self.ttl, acquired_at),
+            )
+            return now + self.ttl
+
+        try:
+            self._expires_at = _transaction(_acquire)
+        except Exception as e:
+            print(f"⚠️ Leader lease check failed: {e}")
+            self._expires_at = 0.0
+        return self.is_leader
+
+    @property
+    def is_leader(self) -> bool:
+        # Keep a safety margin so two processes never both believe they lead
+        return time.time() < self._expires_at - min(5, self.ttl / 4)
+
+    def release(self):
+        if not self._expires_at:
+            return
+        _transaction(lambda conn: conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder)))
+        self._expires_at = 0.0
+
+    def current(self) -> dict:
+        conn = _db()
+        with _conn_lock:
+            row = conn.execute("SELECT holder, acquired_at, expires_at FROM leases WHERE name = ?", (self.name,)).fetchone()
+        if not row:
+            return {"holder": None}
+        return {"holder": row[0], "acquired_at": row[1], "expires_at": row[2], "this_process": row[0] == self.holder}
+
+
+def claim_run(job_id: str, scheduled_for: float, holder: str, catch_up: bool = False):
+    """
+    Atomically claims one scheduled occurrence of a job.
+    A failed occurrence, or one stuck in 'running' past RUN_STALE_AFTER, can be re-claimed.
+
+    Returns:
+        int: The run id, or None if the occurrence already ran or is running elsewhere.
+    """
+    def _claim(conn):
+        now = time.time()
+        row = conn.execute(
+            "SELECT id, status, started_at FROM scheduler_runs WHERE job_id = ? AND scheduled_for = ?",
+            (job_id, scheduled_for),
+        ).fetchone()
+        if row is None:
+            cursor = conn.execute(
+                "INSERT INTO scheduler_runs (job_id, scheduled_for, holder, started_at, status, catch_up) VALUES (?, ?, ?, ?, 'running', ?)",
+                (job_id, scheduled_for, holder, now, int(catch_up)),
+            )
+            return cursor.lastrowid
+        run_id, status, started_at = row
+        if status == "failed" or (status == "running" and now - started_at > RUN_STALE_AFTER):
+            conn.execute(
+                """UPDATE scheduler_runs SET holder = ?, started_at = ?, finished_at = NULL, status = 'running',
+                   attempts = attempts + 1, catch_up = ?, error = NULL WHERE id = ?""",
+                (holder, now, int(catch_up), run_id),
+            )
+            return run_id
+        return None
+
+    return _transaction(_claim)
+
+def finish_run(run_id: int, status: str, error: str = None):
+    _transaction(lambda conn: conn.execute(
+        "UPDATE scheduler_runs SET finished_at = ?, status = ?, error = ? WHERE id = ?",
+        (time.time(), status, error, run_id),
+    ))
+
+def recent_runs(limit: int = 20) -> list:
+    conn = _db()
+    with _conn_lock:
+        rows = conn.execute(
+            """SELECT id, job_id, scheduled_for, holder, started_at, finished_at, status, attempts, catch_up, error
+               FROM scheduler_runs ORDER BY scheduled_for DESC, id DESC LIMIT ?""",
+            (limit,),
+        ).fetchall()
+    keys = ("id", "job_id", "scheduled_for", "holder", "started_at", "finished_at", "status", "attempts", "catch_up", "error")
+    return [dict(zip(keys, row)) for row in rows]
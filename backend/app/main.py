@@ -1,18 +1,19 @@
+from . import startup
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from .agent import get_job_os_agent
-from phi.agent import Agent
 
-from .scheduler import start_scheduler
+from .scheduler import start_scheduler, stop_scheduler, scheduler_status
+from .portfolio import portfolio_snapshot
 
 app = FastAPI(title="JobOs AI Brain")
 
 from fastapi.staticfiles import StaticFiles
 import os
+import sys
 
 # Mount reports directory for downloading
-REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'generated_reports')
+REPORTS_DIR = os.getenv("REPORTS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), 'generated_reports'))
 if not os.path.exists(REPORTS_DIR):
     os.makedirs(REPORTS_DIR)
     
@@ -21,6 +22,27 @@ app.mount("/reports", StaticFiles(directory=REPORTS_DIR), name="reports")
 @app.on_event("startup")
 async def startup_event():
     start_scheduler()
+    portfolio_snapshot.start()
+    startup.mark_ready()
+    # Heavy subsystems load after the port is open; the first request that needs one loads it itself
+    startup.warm_up([
+        ("templates", startup.lazy(".rendering", "warm_templates")),
+        ("job_hunter", startup.preload(".job_hunter")),
+        ("resume_agent", startup.preload(".resume_agent")),
+        ("chat_agent", startup.preload(".agent")),
+        ("chat_history", startup.preload(".services.chat_history")),
+    ])
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    stop_scheduler()
+    portfolio_snapshot.stop()
+    rendering = sys.modules.get(f"{__package__}.rendering")
+    if rendering: # Not imported means no PDF was rendered and there is no pool
+        rendering.shutdown_pool()
+    email = sys.modules.get(f"{__package__}.services.email_service")
+    if email: # Not imported means nothing was queued
+        email.get_email_service().flush(timeout=10)
 
 # CORS - Allow Frontend to connect
 app.add_middleware(
@@ -40,44 +62,119 @@ class HuntRequest(BaseModel):
     experience: str = "Any"
     location: str = "Remote"
     skills: list[str] = []
+    new_only: bool = False # Only report jobs not seen by an earlier hunt
+    top_n: int | None = None # Keep the N best-ranked jobs (defaults to HUNT_TOP_N)
 
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from . import telemetry
+import time
 
-# Initialize Agent
-agent_instance: Agent = get_job_os_agent()
+# The chat agent and its history store (phi, Groq, brain.db) load on first use
+stream_chat = startup.lazy(".agent", "stream_chat")
 
 @app.post("/api/chat")
 async def chat_endpoint(request: ChatRequest):
     try:
         def stream_generator():
-            # Run the agent in streaming mode with session_id
-            response_stream = agent_instance.run(request.message, stream=True, session_id=request.session_id)
-            for chunk in response_stream:
-                if chunk and isinstance(chunk.content, str):
-                    yield chunk.content
+            with telemetry.trace_run("chat", session_id=request.session_id):
+                started = time.perf_counter()
+                first_token = True
+                for text in stream_chat(request.message, request.session_id):
+                    if first_token:
+                        telemetry.stage_seconds.observe(time.perf_counter() - started, stage="chat_first_token")
+                        first_token = False
+                    yield text
 
-        return StreamingResponse(stream_generator(), media_type="text/plain")
+        return StreamingResponse(telemetry.bind_stream(stream_generator()), media_type="text/plain")
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/chat/history/stats")
+def chat_history_stats():
+    from .services.chat_history import chat_history
+    return chat_history.get_stats()
+
+@app.delete("/api/chat/{session_id}")
+def clear_chat_session(session_id: str):
+    from .services.chat_history import chat_history
+    chat_history.clear(session_id)
+    return {"status": "cleared", "session_id": session_id}
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(telemetry.render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
     return {"status": "active", "brain": "online"}
 
-from .job_hunter import run_job_hunt
+@app.get("/api/startup")
+def startup_report():
+    return startup.report()
+
+@app.get("/api/scrape-cache/stats")
+def scrape_cache_stats():
+    from .services.scrape_cache import get_scrape_cache
+    return get_scrape_cache().get_stats()
+
+@app.get("/api/scheduler/status")
+def get_scheduler_status():
+    return scheduler_status()
+
+@app.get("/api/portfolio/status")
+def portfolio_status():
+    return portfolio_snapshot.status()
+
+from .services import http_client
+send_report_digest = startup.lazy(".reporting", "send_report_digest")
+
+@app.get("/api/outbound/stats")
+def outbound_stats():
+    return http_client.get_stats()
+
+@app.get("/api/router/stats")
+def router_stats():
+    from .job_hunter import extraction_router
+    return {"extract": extraction_router.get_stats()}
+
+@app.get("/api/artifacts/stats")
+def artifact_stats():
+    from .services.artifact_store import get_artifact_store
+    return get_artifact_store().get_stats()
+
+@app.get("/api/email/stats")
+def email_stats():
+    from .services.email_service import get_email_service
+    return get_email_service().get_stats()
+
+@app.post("/api/email/digest")
+async def send_email_digest():
+    return {"sent": await run_in_threadpool(send_report_digest)}
+
+@app.post("/api/artifacts/gc")
+async def artifact_gc():
+    from .services.artifact_store import get_artifact_store
+    return await run_in_threadpool(get_artifact_store().gc)
+
+run_job_hunt = startup.lazy(".job_hunter", "run_job_hunt")
+
+def _hunt_preferences(request: HuntRequest) -> dict:
+    return {
+        "role": request.role,
+        "experience": request.experience,
+        "location": request.location,
+        "skills": request.skills,
+        "top_n": request.top_n
+    }
 
 @app.post("/api/trigger-hunt")
 async def trigger_hunt(request: HuntRequest):
     try:
-        # Run the job hunt logic with preferences
-        preferences = {
-            "role": request.role,
-            "experience": request.experience,
-            "location": request.location,
-            "skills": request.skills
-        }
-        results = run_job_hunt(preferences)
+        # Run the job hunt logic with preferences (off the event loop)
+        preferences = _hunt_preferences(request)
+        results = await run_in_threadpool(run_job_hunt, preferences, new_only=request.new_only)
         return {"status": "success", "data": results}
     except Exception as e:
         print(f"Error during manual hunt: {e}")
@@ -88,39 +185,17 @@ class ResumeRequest(BaseModel):
     job_title: str
     style: str = "harvard"
 
-from .resume_agent import generate_tailored_resume
-from .reporting import generate_resume_pdf
-import json
+build_resume = startup.lazy(".resume_agent", "build_resume")
 
 @app.post("/api/generate-resume")
 async def generate_resume(request: ResumeRequest):
     try:
         print(f"Received resume request for: {request.job_title} (Style: {request.style})")
         
-        # 1. Generate Content (AI)
-        raw_content = generate_tailored_resume(request.job_description)
-        print(f"AI Response Preview: {raw_content[:200]}...") # Debug log
-        
-        # Parse JSON from AI response
-        # Clean potential markdown fences
-        clean_json = raw_content.replace("```json", "").replace("```", "").strip()
+        # Blocking LLM + PDF work runs off the event loop
+        result = await run_in_threadpool(build_resume, request.job_description, request.job_title, request.style)
         
-        # Attempt to find the first '{' and last '}' to handle potential preamble text
-        start_idx = clean_json.find('{')
-        end_idx = clean_json.rfind('}')
-        if start_idx != -1 and end_idx != -1:
-            clean_json = clean_json[start_idx:end_idx+1]
-            
-        try:
-            resume_data = json.loads(clean_json)
-        except json.JSONDecodeError as je:
-             print(f"JSON Decode Error! Raw content was: {clean_json}")
-             raise ValueError("AI did not return valid JSON. Please try again.")
-
-        # 2. Generate PDF with Style
-        result = generate_resume_pdf(resume_data, request.job_title, style=request.style)
-        
-        return {"status": "success", "data": result, "preview": resume_data}
+        return {"status": "success", "data": result["data"], "preview": result["preview"]}
         
     except Exception as e:
         print(f"Error generating resume: {e}")
@@ -128,3 +203,94 @@ async def generate_resume(request: ResumeRequest):
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+# --- Background Tasks (non-blocking hunts & resumes) ---
+
+from .tasks import task_manager, TaskQueueFull
+import asyncio
+import json
+
+def _submit_task(kind: str, fn, *args, params: dict = None, **kwargs):
+    try:
+        task = task_manager.submit(kind, fn, *args, params=params, **kwargs)
+    except TaskQueueFull as e:
+        raise HTTPException(status_code=429, detail=f"Task queue is full: {e}")
+    return {"task_id": task.id, "status": task.status}
+
+@app.post("/api/tasks/hunt", status_code=202)
+async def submit_hunt_task(request: HuntRequest):
+    preferences = _hunt_preferences(request)
+    return _submit_task("hunt", run_job_hunt, preferences, new_only=request.new_only, params=preferences)
+
+@app.post("/api/tasks/resume", status_code=202)
+async def submit_resume_task(request: ResumeRequest):
+    return _submit_task(
+        "resume", build_resume, request.job_description, request.job_title, request.style,
+        params={"job_title": request.job_title, "style": request.style}
+    )
+
+def _get_task_or_404(task_id: str):
+    task = task_manager.get(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+@app.get("/api/tasks/{task_id}")
+def get_task_status(task_id: str):
+    return _get_task_or_404(task_id).summary()
+
+@app.get("/api/tasks/{task_id}/result")
+def get_task_result(task_id: str):
+    task = _get_task_or_404(task_id)
+    if not task.done:
+        return JSONResponse(status_code=202, content=task.summary())
+    if task.status == "failed":
+        raise HTTPException(status_code=500, detail=task.error)
+    return {"status": "success", "data": task.result}
+
+def _sse(event: str, data, seq: int = None) -> str:
+    prefix = f"id: {seq}\n" if seq is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _task_event_stream(task, include_result: bool = False):
+    """
+    Async SSE generator replaying a task's events from the start, then following it live.
+    """
+    async def event_stream():
+        seq = 0
+        idle = 0.0
+        while True:
+            events = task.events_since(seq)
+            for ev in events:
+                yield _sse(ev['event'], ev['data'], ev['seq'])
+            seq += len(events)
+            if task.done and not task.events_since(seq):
+                if include_result and task.status == "succeeded":
+                    yield _sse("result", task.result)
+                break
+            if events:
+                idle = 0.0
+            elif idle >= 15:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(0.25)
+            idle += 0.25
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/tasks/{task_id}/events")
+async def stream_task_events(task_id: str):
+    return _task_event_stream(_get_task_or_404(task_id))
+
+@app.post("/api/hunt/stream")
+async def stream_hunt(request: HuntRequest):
+    """
+    Runs a hunt and streams its progress as Server-Sent Events: target_started,
+    scrape_done, jobs (incremental, parsed from the streaming LLM output),
+    target_done, dedup, hunt_complete and finally the full result.
+    """
+    preferences = _hunt_preferences(request)
+    task_info = _submit_task("hunt", run_job_hunt, preferences, new_only=request.new_only, params=preferences)
+    return _task_event_stream(task_manager.get(task_info["task_id"]), include_result=True)
+
+startup.mark_imported()
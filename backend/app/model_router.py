@@ -0,0 +1,127 @@
+import time
+import threading
+from .services import http_client
+from .preprocess import estimate_tokens
+from . import telemetry
+
+GROQ_HOST = "api.groq.com"
+
+
+class ModelRouter:
+    """
+    Tiered model calls: each prompt goes to the cheapest tier first and only moves
+    to the next (larger, slower) tier when the output fails the caller's check.
+
+    Per-tier latency, outcomes and token counts are kept in `stats` and exported
+    as jobos_router_* metrics so the tiers and thresholds can be tuned.
+    """
+
+    def __init__(self, name: str, tiers: list, build_agent):
+        """
+        Args:
+            name (str): Router name used in metrics/logs (e.g. 'extract').
+            tiers (list): [(tier, model_id)] from cheapest to strongest.
+            build_agent: fn(model_id) -> phi Agent. Called per request, since agents keep per-run state.
+        """
+        self.name = name
+        self.tiers = tiers
+        self.build_agent = build_agent
+        self.stats = {tier: {"model": model_id, "calls": 0, "accepted": 0, "escalated": 0, "rejected": 0,
+                             "errors": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+                      for tier, model_id in tiers}
+        self._lock = threading.Lock()
+
+    @property
+    def signature(self) -> str:
+        """Model ids of every tier, for cache keys."""
+        return "+".join(model_id for _, model_id in self.tiers)
+
+    def _call(self, tier: str, model_id: str, prompt: str, on_text=None) -> str:
+        agent = self.build_agent(model_id)
+        if on_text is None:
+            return http_client.call_with_retry(GROQ_HOST, agent.run, prompt).content or ""
+        parts = []
+        with http_client.guarded(GROQ_HOST):
+            for piece in agent.run(prompt, stream=True):
+                if piece and isinstance(piece.content, str):
+                    parts.append(piece.content)
+                    on_text(tier, piece.content)
+        return "".join(parts)
+
+    def _record(self, tier: str, outcome: str, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0):
+        with self._lock:
+            stats = self.stats[tier]
+            stats["calls"] += 1
+            stats[outcome] += 1
+            stats["seconds"] = round(stats["seconds"] + seconds, 4)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+        telemetry.router_calls.inc(router=self.name, tier=tier, outcome=outcome)
+        telemetry.router_seconds.observe(seconds, router=self.name, tier=tier)
+
+    def run(self, prompt: str, check, on_text=None, stage: str = "llm"):
+        """
+        Runs the prompt through the tiers until one passes `check`.
+
+        Args:
+            prompt (str): User prompt.
+            check: fn(raw_output) -> (value, problem). `value` is the parsed result
+                (None if unusable); `problem` is None to accept it, or a short reason
+                to escalate. Exceptions count as unusable output.
+            on_text: fn(tier, text) receiving streamed output; streaming is off when None.
+            stage (str): Telemetry span name for the model calls.
+
+        Returns:
+            tuple: (value, tier, accepted). When no tier passes, the usable value
+            from the strongest tier that produced one, with accepted False.
+
+        Raises:
+            Exception: The last error (or a ValueError) when no tier produced a usable value.
+        """
+        fallback = None
+        last_error = None
+        for i, (tier, model_id) in enumerate(self.tiers):
+            escalate = i < len(self.tiers) - 1
+            started = time.perf_counter()
+            try:
+                with telemetry.span(stage, tier=tier, model=model_id):
+                    raw_output = self._call(tier, model_id, prompt, on_text)
+            except Exception as e:
+                self._record(tier, "errors", time.perf_counter() - started)
+                print(f"    [Router] {self.name}/{tier} ({model_id}) failed: {e}")
+                last_error = e
+                continue
+            seconds = time.perf_counter() - started
+            prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(raw_output)
+            telemetry.record_tokens(f"{self.name}_{tier}", prompt_tokens, completion_tokens)
+
+            try:
+                with telemetry.span("json_parse"):
+                    value, problem = check(raw_output)
+            except Exception as e:
+                value, problem = None, f"unusable output ({e})"
+            if problem is None:
+                self._record(tier, "accepted", seconds, prompt_tokens, completion_tokens)
+                return value, tier, True
+
+            self._record(tier, "escalated" if escalate else "rejected", seconds, prompt_tokens, completion_tokens)
+            print(f"    [Router] {self.name}/{tier} ({model_id}): {problem}{', escalating' if escalate else ''}")
+            if value is not None:
+                fallback = (value, tier, False)
+            last_error = ValueError(problem)
+
+        if fallback is not None:
+            return fallback
+        raise last_error
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for tier, stats in self.stats.items():
+                calls = stats["calls"]
+                result[tier] = {
+                    **stats,
+                    "success_rate": round(stats["accepted"] / calls, 3) if calls else None,
+                    "avg_s": round(stats["seconds"] / calls, 3) if calls else None,
+                }
+            return result
@@ -0,0 +1,183 @@
+import os
+import copy
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .services import pocketbase_client as pbc
+
+PORTFOLIO_TTL = int(os.getenv("PORTFOLIO_TTL", "300"))
+PORTFOLIO_REALTIME = os.getenv("PORTFOLIO_REALTIME", "1") != "0"
+PORTFOLIO_MAX_ITEMS = int(os.getenv("PORTFOLIO_MAX_ITEMS", "20"))
+RECONNECT_MAX = 60
+
+PROJECT_FIELDS = "id,created,project_name,tech_stack,description,category"
+CERT_FIELDS = "id,created,certificate_name,provider,completion_date"
+TOPICS = ("projects", "certifications")
+
+
+class PortfolioSnapshot:
+    """
+    In-process copy of the portfolio used for resume writing and job ranking.
+
+    Loaded once, then kept fresh by a PocketBase realtime subscription that applies
+    create/update/delete events to the cached records. When the realtime stream
+    is unavailable the snapshot falls back to a TTL and reloads in the background,
+    so readers never wait on the network after the first load.
+    """
+
+    def __init__(self, ttl: int = PORTFOLIO_TTL, realtime: bool = PORTFOLIO_REALTIME):
+        self.ttl = ttl
+        self.realtime = realtime
+        self.records = {"projects": {}, "certifications": {}}
+        self.context = None
+        self.loaded_at = 0.0
+        self.connected = False
+        self.stats = {"loads": 0, "events": 0, "reconnects": 0}
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Loading ---
+
+    def _fetch(self) -> dict:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            projects = pool.submit(pbc.list_records, "projects", sort="-created", fields=PROJECT_FIELDS)
+            certs = pool.submit(pbc.list_records, "certifications", sort="-created", fields=CERT_FIELDS)
+            records = {}
+            for name, future in (("projects", projects), ("certifications", certs)):
+                try:
+                    records[name] = {r["id"]: r for r in future.result()}
+                except Exception as e:
+                    print(f"Warning: Could not fetch {name} for portfolio: {e}")
+                    records[name] = None
+        return records
+
+    def reload(self):
+        """Fetches both collections and swaps them in. A failed collection keeps its last copy."""
+        with self._reload_lock:
+            records = self._fetch()
+            with self._lock:
+                for name, items in records.items():
+                    if items is not None:
+                        self.records[name] = items
+                self._rebuild_locked()
+                self.loaded_at = time.time()
+                self.stats["loads"] += 1
+
+    def _rebuild_locked(self):
+        def newest(items):
+            return sorted(items.values(), key=lambda r: r.get("created", ""), reverse=True)[:PORTFOLIO_MAX_ITEMS]
+
+        projects = [{
+            "name": p.get("project_name") or "Untitled",
+            "tech_stack": p.get("tech_stack", ""),
+            "description": p.get("description", ""),
+            "category": p.get("category", "")
+        } for p in newest(self.records["projects"])]
+        certifications = [{
+            "name": c.get("certificate_name") or "Untitled",
+            "provider": c.get("provider", ""),
+            "date": c.get("completion_date", "")
+        } for c in newest(self.records["certifications"])]
+
+        # Skills are the unique tech stacks across projects
+        all_tech = set()
+        for p in projects:
+            if p["tech_stack"]:
+                all_tech.update(s.strip() for s in p["tech_stack"].split(',') if s.strip())
+        self.context = {"projects": projects, "certifications": certifications, "skills": sorted(all_tech)}
+
+    def get(self) -> dict:
+        """
+        Returns a copy of the portfolio context ({"projects", "certifications", "skills"}).
+        Only the very first call blocks on PocketBase.
+        """
+        if self.context is None:
+            self.reload()
+        elif not self.connected and time.time() - self.loaded_at > self.ttl and not self._reload_lock.locked():
+            threading.Thread(target=self._safe_reload, daemon=True).start()
+        with self._lock:
+            return copy.deepcopy(self.context)
+
+    def _safe_reload(self):
+        try:
+            self.reload()
+        except Exception as e:
+            print(f"⚠️ Portfolio refresh failed: {e}")
+
+    # --- Realtime ---
+
+    def apply_event(self, topic: str, payload: dict):
+        action = payload.get("action")
+        record = payload.get("record") or {}
+        if topic not in self.records or not record.get("id"):
+            return
+        with self._lock:
+            if action == "delete":
+                self.records[topic].pop(record["id"], None)
+            else:
+                self.records[topic][record["id"]] = record
+            self._rebuild_locked()
+            self.stats["events"] += 1
+
+    def _listen_once(self):
+        response = pbc.open_realtime()
+        try:
+            for event, data in pbc.iter_sse(response):
+                if self._stop.is_set():
+                    return
+                if event == "PB_CONNECT":
+                    pbc.set_subscriptions(json.loads(data)["clientId"], list(TOPICS))
+                    # Changes made while disconnected are not replayed, so resync first
+                    self.reload()
+                    self.connected = True
+                    print("📡 Portfolio snapshot subscribed to PocketBase realtime.")
+                elif event in TOPICS:
+                    self.apply_event(event, json.loads(data))
+        finally:
+            self.connected = False
+            response.close()
+
+    def _listen(self):
+        delay = 1
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                self._listen_once()
+            except Exception as e:
+                if not self._stop.is_set():
+                    print(f"⚠️ Portfolio realtime stream dropped ({type(e).__name__}), using TTL until it reconnects")
+            if self._stop.is_set():
+                break
+            self.stats["reconnects"] += 1
+            if time.time() - started > RECONNECT_MAX:
+                delay = 1 # The stream was healthy for a while; start backing off afresh
+            self._stop.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    def start(self):
+        if not self.realtime or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="portfolio-realtime", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # The listener is a daemon thread blocked on the stream; it exits on the next event or with the process
+        self._stop.set()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.context is not None,
+                "age_s": round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+                "mode": "realtime" if self.connected else "ttl",
+                "projects": len(self.records["projects"]),
+                "certifications": len(self.records["certifications"]),
+                **self.stats,
+            }
+
+
+portfolio_snapshot = PortfolioSnapshot()
@@ -0,0 +1,114 @@
+import re
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+# Jina's header lines, dropped unconditionally
+STRONG_BOILERPLATE = re.compile(r'^(?:url source|published time|markdown content|warning):', re.IGNORECASE)
+# Legal footers and cookie banners: dropped unless the line names a role ("Privacy Policy Engineer").
+# Only role words count; board names such as "Remote OK" would pass JOB_HINT
+LEGAL_BOILERPLATE = re.compile(
+    r'cookie|privacy policy|terms of (?:service|use)|all rights reserved|©|copyright',
+    re.IGNORECASE
+)
+# Chrome that is dropped unless the line also looks like part of a listing
+WEAK_BOILERPLATE = re.compile(
+    r'sign ?in\b|sign ?up\b|log ?in\b|log ?out\b|create (?:an )?account|subscribe|newsletter'
+    r'|accept all|manage preferences|skip to (?:main )?content|download (?:the )?app'
+    r'|follow us|help center|contact us|about us|^\s*(?:home|menu|search|close|back to top)\s*$',
+    re.IGNORECASE
+)
+ROLE_HINT = re.compile(
+    r'engineer|developer|scientist|designer|manager|analyst|architect|intern|lead\b|head of',
+    re.IGNORECASE
+)
+JOB_HINT = re.compile(
+    ROLE_HINT.pattern +
+    r'|remote|hybrid|on-?site|full[- ]time|part[- ]time|contract|salary|\$\s?\d|€\s?\d|₹|\d+k\b|lpa'
+    r'|apply|posted|ago\b|years? (?:of )?exp',
+    re.IGNORECASE
+)
+IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+LINKED_IMAGE = re.compile(r'\[\s*!\[[^\]]*\]\([^)]*\)\s*\]\([^)]*\)')
+LINK = re.compile(r'\[([^\]]*)\]\((\S+?)(?:\s+"[^"]*")?\)')
+TRACKING_PARAM = re.compile(r'^(utm_.*|trk|trkInfo|trackingId|refId|ref|gclid|fbclid|position|pageNum|_ga)$', re.IGNORECASE)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for Llama-family tokenizers (~4 chars per token on English/Markdown).
+    """
+    return (len(text) + 3) // 4
+
+def _strip_tracking(url: str) -> str:
+    parsed = urlparse(url)
+    if not parsed.query:
+        return url
+    query = [(k, v) for k, v in parse_qsl(parsed.query) if not TRACKING_PARAM.match(k)]
+    return urlunparse(parsed._replace(query=urlencode(query), fragment=""))
+
+def _collapse_link(match: re.Match) -> str:
+    text = match.group(1).strip()
+    url = match.group(2)
+    if not text:
+        return ""
+    if url.startswith(("#", "javascript:", "mailto:")):
+        return text
+    return f"[{text}]({_strip_tracking(url)})"
+
+def _is_nav_block(lines: list) -> bool:
+    """A block made only of short links to shallow paths (menus, category lists, pagination)."""
+    for line in lines:
+        links = LINK.findall(line)
+        rest = LINK.sub("", line).strip(" -*|•·>#")
+        if rest or not links:
+            return False
+        for text, url in links:
+            depth = len([p for p in urlparse(url).path.split("/") if p])
+            if len(text.split()) > 4 or depth > 1 or re.search(r'\d{3,}', url):
+                return False
+    return True
+
+def clean_markdown(markdown: str) -> str:
+    """
+    Strips page chrome from Jina Markdown before it is sent to the LLM.
+    Removes images, cookie/footer/navigation lines and menu-only blocks, drops
+    tracking parameters from links and keeps only blocks that look like listings.
+    """
+    text = LINKED_IMAGE.sub("", markdown)
+    text = IMAGE.sub("", text)
+    text = LINK.sub(_collapse_link, text)
+
+    blocks = []
+    current = []
+    for line in text.splitlines() + [""]:
+        stripped = line.strip()
+        if not stripped:
+            if current:
+                blocks.append(current)
+                current = []
+            continue
+        visible = LINK.sub(lambda m: m.group(1), stripped)
+        if STRONG_BOILERPLATE.search(visible):
+            continue
+        if LEGAL_BOILERPLATE.search(visible) and not ROLE_HINT.search(visible):
+            continue
+        if WEAK_BOILERPLATE.search(visible) and not JOB_HINT.search(visible):
+            continue
+        if re.fullmatch(r'[-=*_|: ]+', stripped):
+            continue # Rules and table separators carry no content
+        current.append(re.sub(r'\s{2,}', ' ', stripped))
+
+    kept = []
+    for block in blocks:
+        joined = "\n".join(block)
+        if _is_nav_block(block):
+            continue
+        if JOB_HINT.search(joined) or LINK.search(joined) or block[0].startswith("#"):
+            kept.append(joined)
+    return "\n\n".join(kept)
+
+def preprocess_page(markdown: str):
+    """
+    Returns:
+        tuple: (cleaned_markdown, {"tokens_before": int, "tokens_after": int})
+    """
+    cleaned = clean_markdown(markdown)
+    return cleaned, {"tokens_before": estimate_tokens(markdown), "tokens_after": estimate_tokens(cleaned)}
@@ -0,0 +1,44 @@
+import os
+import json
+from .db import BACKEND_DIR
+from .services import pocketbase_client as pbc
+HUNT_PROFILES_FILE = os.getenv("HUNT_PROFILES_FILE", os.path.join(BACKEND_DIR, "hunt_profiles.json"))
+
+DEFAULT_PROFILE = {"name": "default", "role": "Generative AI", "location": "Remote", "experience": "Any", "skills": []}
+
+def _normalize_profile(raw: dict) -> dict:
+    skills = raw.get("skills") or []
+    if isinstance(skills, str):
+        skills = [s.strip() for s in skills.split(",") if s.strip()]
+    profile = {
+        "name": raw.get("name") or raw.get("id") or raw.get("role", "profile"),
+        "role": raw.get("role") or DEFAULT_PROFILE["role"],
+        "location": raw.get("location", ""),
+        "experience": raw.get("experience") or "Any",
+        "skills": skills,
+    }
+    if raw.get("top_n"):
+        profile["top_n"] = int(raw["top_n"])
+    return profile
+
+def load_hunt_profiles() -> list:
+    """
+    Loads saved hunt preference profiles.
+    Sources, in order: the PocketBase 'hunt_profiles' collection (active records),
+    the HUNT_PROFILES_FILE JSON list, then the single default profile.
+    """
+    try:
+        items = pbc.list_records("hunt_profiles", filter_str="active=true")
+        if items:
+            return [_normalize_profile(item) for item in items]
+    except Exception as e:
+        print(f"⚠️ Could not load hunt profiles from PocketBase: {e}")
+
+    if os.path.exists(HUNT_PROFILES_FILE):
+        try:
+            with open(HUNT_PROFILES_FILE, "r", encoding="utf-8") as f:
+                return [_normalize_profile(p) for p in json.load(f) if p.get("active", True)]
+        except Exception as e:
+            print(f"⚠️ Could not read {HUNT_PROFILES_FILE}: {e}")
+
+    return [dict(DEFAULT_PROFILE)]
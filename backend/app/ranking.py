@@ -0,0 +1,104 @@
+import os
+import re
+import numpy as np
+
+HUNT_TOP_N = int(os.getenv("HUNT_TOP_N", "0")) # 0 = keep every job
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Relative weight of each preference source in the query
+QUERY_WEIGHTS = {"role": 2.0, "skills": 1.5, "location": 1.0, "portfolio": 0.5}
+
+TOKEN = re.compile(r'[a-z0-9+#]+(?:\.[a-z0-9]+)?')
+STOPWORDS = {"and", "or", "the", "a", "an", "of", "for", "in", "to", "with", "at", "on", "any"}
+
+def tokenize(text: str) -> list:
+    return [t for t in TOKEN.findall((text or "").lower()) if t not in STOPWORDS]
+
+def build_query(preferences: dict, portfolio: dict = None) -> dict:
+    """
+    Builds weighted query terms from hunt preferences and the portfolio's tech stacks.
+
+    Returns:
+        dict: {term: weight}, keeping the highest weight when a term appears twice.
+    """
+    sources = {
+        "role": [preferences.get('role', '')],
+        "skills": preferences.get('skills') or [],
+        "location": [preferences.get('location', '')],
+        "portfolio": (portfolio or {}).get('skills') or [],
+    }
+    query = {}
+    for source, texts in sources.items():
+        weight = QUERY_WEIGHTS[source]
+        for text in texts:
+            for term in tokenize(text):
+                query[term] = max(query.get(term, 0.0), weight)
+    return query
+
+def _job_text(job: dict) -> str:
+    # Title counts twice, a cheap stand-in for BM25F field boosting
+    title = job.get('title', '')
+    return " ".join((title, title, job.get('company', ''), job.get('location', ''), job.get('summary', '')))
+
+def score_jobs(jobs: list, query: dict) -> np.ndarray:
+    """
+    Scores every job against the query with BM25 in one vectorised pass.
+    Tokens of all jobs are flattened into one array of query-term ids; term
+    frequencies come from a single bincount over (job, term) pairs, so the cost
+    grows with the total token count rather than jobs x terms.
+    """
+    n_docs = len(jobs)
+    if not n_docs or not query:
+        return np.zeros(n_docs)
+
+    doc_tokens = [tokenize(_job_text(job)) for job in jobs]
+    doc_len = np.fromiter((len(t) for t in doc_tokens), dtype=np.float64, count=n_docs)
+    flat_tokens = [t for tokens in doc_tokens for t in tokens]
+    if not flat_tokens:
+        return np.zeros(n_docs)
+    doc_ids = np.repeat(np.arange(n_docs), doc_len.astype(np.int64))
+
+    terms = list(query)
+    weights = np.array([query[t] for t in terms])
+    term_index = {t: i for i, t in enumerate(terms)}
+    token_terms = np.fromiter((term_index.get(t, -1) for t in flat_tokens), dtype=np.int64, count=len(flat_tokens))
+
+    hit = token_terms >= 0
+    n_terms = len(terms)
+    tf = np.bincount(doc_ids[hit] * n_terms + token_terms[hit], minlength=n_docs * n_terms)
+    tf = tf.reshape(n_docs, n_terms).astype(np.float64)
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    avg_len = doc_len.mean() or 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len)
+    bm25 = tf * (BM25_K1 + 1) / (tf + norm[:, None])
+    return bm25 @ (idf * weights)
+
+def rank_jobs(jobs: list, preferences: dict, portfolio: dict = None, top_n: int = None) -> list:
+    """
+    Sorts jobs by relevance to the candidate profile and applies the top-N cutoff.
+    Each returned job gets a 'score' field.
+
+    Args:
+        jobs (list): Job dicts {title, company, location, link, summary, source}
+        preferences (dict): {role, location, skills, ...}
+        portfolio (dict): Output of resume_agent.fetch_user_portfolio (optional)
+        top_n (int): Max jobs to keep; defaults to HUNT_TOP_N (0 = all)
+    """
+    if not jobs:
+        return []
+    scores = score_jobs(jobs, build_query(preferences, portfolio))
+    order = np.argsort(-scores, kind="stable")
+    limit = HUNT_TOP_N if top_n is None else top_n
+    if limit:
+        order = order[:limit]
+    ranked = []
+    for i in order:
+        job = dict(jobs[i])
+        job['score'] = round(float(scores[i]), 3)
+        ranked.append(job)
+    return ranked
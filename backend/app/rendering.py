@@ -0,0 +1,164 @@
+import os
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from jinja2 import Environment, FileSystemLoader
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+RENDER_PAGE_SIZE = int(os.getenv("RENDER_PAGE_SIZE", "50"))
+# Recycle workers now and then; reportlab keeps font/image caches alive
+RENDER_TASKS_PER_WORKER = int(os.getenv("RENDER_TASKS_PER_WORKER", "50"))
+
+# Templates are compiled once per process and never re-checked on disk
+env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), auto_reload=False, cache_size=-1)
+
+_pool = None
+_pool_tasks = 0 # Tasks sent to the current pool (recycling before Python 3.11)
+_pool_lock = threading.Lock()
+
+def warm_templates():
+    """Compiles every template up front so the first report doesn't pay for it."""
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
+
+def render_html(template_name: str, context: dict) -> str:
+    return env.get_template(template_name).render(context)
+
+def write_html(template_name: str, context: dict, path: str):
+    """Streams the rendered template to disk instead of building one big string."""
+    env.get_template(template_name).stream(context).dump(path, encoding="utf-8")
+
+def _html_to_pdf_file(html: str, pdf_path: str) -> int:
+    # Runs in a worker process; imported lazily so the parent only pays for it on fallback
+    from xhtml2pdf import pisa
+    with open(pdf_path, "wb") as pdf_file:
+        return pisa.CreatePDF(html, dest=pdf_file).err
+
+def _get_pool(tasks: int = 1):
+    """
+    Returns the render pool for `tasks` upcoming submissions (None if disabled).
+    max_tasks_per_child needs Python 3.11; before that the whole pool is replaced
+    once it has been sent RENDER_TASKS_PER_WORKER tasks per worker.
+    """
+    global _pool, _pool_tasks
+    with _pool_lock:
+        if RENDER_WORKERS <= 0:
+            return None
+        recycle = sys.version_info < (3, 11) and RENDER_TASKS_PER_WORKER > 0
+        if _pool is not None and recycle and _pool_tasks >= RENDER_TASKS_PER_WORKER * RENDER_WORKERS:
+            _pool.shutdown(wait=False) # Work already queued on it still finishes
+            _pool = None
+        if _pool is None:
+            # spawn: forking a threaded server process can deadlock the child
+            options = {"max_tasks_per_child": RENDER_TASKS_PER_WORKER} if not recycle and RENDER_TASKS_PER_WORKER > 0 else {}
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                **options,
+            )
+            _pool_tasks = 0
+        _pool_tasks += tasks
+        return _pool
+
+def _reset_pool(pool):
+    """Drops `pool` after a crash, unless another thread already replaced it."""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+
+def _convert_all(parts: list) -> int:
+    """
+    Converts [(html, pdf_path)] in the process pool, falling back to this process
+    if the pool is disabled or a worker died.
+
+    Returns:
+        int: Total pisa error count.
+    """
+    pool = _get_pool(len(parts))
+    futures = []
+    if pool is not None:
+        try:
+            for html, path in parts:
+                futures.append(pool.submit(_html_to_pdf_file, html, path))
+        except RuntimeError as e:
+            # BrokenProcessPool, or another thread shut the pool down (recycled or reset)
+            # between _get_pool and submit: the rest is rendered here
+            print(f"⚠️ PDF render pool unavailable ({e}), rendering in-process")
+            if isinstance(e, BrokenProcessPool):
+                _reset_pool(pool)
+
+    errors = 0
+    crashed = False
+    for n, (html, path) in enumerate(parts):
+        if n < len(futures):
+            try:
+                errors += futures[n].result()
+                continue
+            except (BrokenProcessPool, CancelledError):
+                if not crashed:
+                    print("⚠️ PDF render pool crashed, rendering in-process")
+                    _reset_pool(pool)
+                    crashed = True
+        errors += _html_to_pdf_file(html, path)
+    return errors
+
+def render_pdf(template_name: str, context: dict, pdf_path: str, items_key: str = None,
+               page_size: int = RENDER_PAGE_SIZE) -> bool:
+    """
+    Renders a template to PDF off the request thread.
+    When `items_key` names a list longer than `page_size`, the list is rendered in
+    slices (in parallel) and the partial PDFs are merged, so no single xhtml2pdf
+    run has to lay out the whole document.
+
+    Args:
+        template_name (str): Template file in app/templates.
+        context (dict): Template context.
+        pdf_path (str): Output path.
+        items_key (str): Context key holding the repeated items (e.g. 'jobs').
+        page_size (int): Items per slice.
+
+    Returns:
+        bool: True if the PDF was written without errors.
+    """
+    items = context.get(items_key) if items_key else None
+    if not items or len(items) <= page_size:
+        return _convert_all([(render_html(template_name, context), pdf_path)]) == 0
+
+    slices = [items[i:i + page_size] for i in range(0, len(items), page_size)]
+    parts = []
+    for n, chunk in enumerate(slices):
+        part_context = {
+            **context,
+            items_key: chunk,
+            "show_header": n == 0,
+            "show_footer": n == len(slices) - 1,
+        }
+        parts.append((render_html(template_name, part_context), f"{pdf_path}.part{n}"))
+
+    try:
+        if _convert_all(parts):
+            return False
+        from pypdf import PdfWriter
+        writer = PdfWriter()
+        for _, part_path in parts:
+            writer.append(part_path)
+        with open(pdf_path, "wb") as f:
+            writer.write(f)
+        return True
+    finally:
+        for _, part_path in parts:
+            if os.path.exists(part_path):
+                os.remove(part_path)
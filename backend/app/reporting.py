@@ -1,19 +1,10 @@
 import os
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader
-from xhtml2pdf import pisa
-from pocketbase import PocketBase
-
-# Initialize PocketBase (Use Env Var for Cloud, fallback to Localhost)
-# Initialize PocketBase (Use Env Var for Cloud, fallback to Localhost)
-PB_URL = os.getenv("POCKETBASE_URL", "http://127.0.0.1:8090")
-pb = PocketBase(PB_URL)
-
-from .services.email_service import EmailService
-email_service = EmailService()
-
-TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
-OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'generated_reports')
+from .rendering import render_html, write_html, render_pdf
+from . import telemetry
+from .services.email_service import get_email_service
+from .services import pocketbase_client as pbc
+from .services.artifact_store import get_artifact_store, hash_file, OUTPUT_DIR
 
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
@@ -30,9 +21,6 @@ def generate_job_report(jobs: list, metadata: dict):
     Returns:
         dict: {pdf_path, html_path, pb_record_id}
     """
-    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-    template = env.get_template('report_template.html')
-    
     # 1. Render HTML
     date_str = datetime.now().strftime("%Y-%m-%d")
     context = {
@@ -42,84 +30,72 @@ def generate_job_report(jobs: list, metadata: dict):
         'total_jobs': len(jobs),
         'jobs': jobs
     }
-    html_content = template.render(context)
-    
     # Files
     filename_base = f"JobOs_Report_{date_str}_{datetime.now().strftime('%H%M%S')}"
     html_path = os.path.join(OUTPUT_DIR, f"{filename_base}.html")
     pdf_path = os.path.join(OUTPUT_DIR, f"{filename_base}.pdf")
     
     # Save HTML
-    with open(html_path, "w", encoding='utf-8') as f:
-        f.write(html_content)
-        
-    # 2. Generate PDF
-    with open(pdf_path, "wb") as pdf_file:
-        pisa_status = pisa.CreatePDF(html_content, dest=pdf_file)
-        
-    if pisa_status.err:
-        print(f"Error generating PDF: {pisa_status.err}")
-        return None
+    with telemetry.span("render_html", template="report"):
+        write_html('report_template.html', context, html_path)
 
-    # 3. Store in PocketBase (Using requests for reliable file upload)
-    record_id = None
-    try:
-        import requests
-        
-        # Prepare multipart form data
-        # We need to open the files ensuring they stay open during the request
-        fname_pdf = os.path.basename(pdf_path)
-        fname_html = os.path.basename(html_path)
-        
-        with open(pdf_path, 'rb') as f_pdf, open(html_path, 'rb') as f_html:
-            files = [
-                ('report_pdf', (fname_pdf, f_pdf, 'application/pdf')),
-                ('report_html', (fname_html, f_html, 'text/html'))
-            ]
-            
-            data = {
-                "date": datetime.now().isoformat(),
-                "role": metadata.get('role', ''),
-                "status": "Completed",
-                "jobs_found": len(jobs)
-            }
-            
-            # Use direct API endpoint
-            api_url = f"{PB_URL}/api/collections/job_reports/records"
-            response = requests.post(api_url, data=data, files=files)
-            
-            if response.status_code >= 200 and response.status_code < 300:
-                record = response.json()
-                record_id = record.get('id')
-                print(f"✅ Report saved to PocketBase: {record_id}")
-            else:
-                print(f"⚠️ Failed to upload to PocketBase: {response.status_code} - {response.text}")
-            
-    except Exception as e:
-        print(f"⚠️ Failed to upload to PocketBase (Ensure 'job_reports' collection exists): {e}")
+    # Identical report already stored? Reuse its PDF and record instead of rendering/uploading again
+    content_hash = hash_file(html_path, extra="job_reports")
+    existing = get_artifact_store().find(content_hash)
+    if existing:
+        if html_path not in existing["paths"]:
+            os.remove(html_path)
+        pdf_path, html_path = existing["paths"]
+        record_id = existing["record_id"]
+        print(f"♻️ Identical report already stored: {record_id}")
+    else:
+        # 2. Generate PDF (process pool; long job lists are rendered in slices and merged)
+        with telemetry.span("render_pdf", template="report"):
+            rendered = render_pdf('report_template.html', context, pdf_path, items_key='jobs')
+        if not rendered:
+            print("Error generating PDF")
+            return None
 
-    # 4. Send Email Notification
-    if record_id:
+        # 3. Store in PocketBase (streamed multipart upload, indexed by content hash)
+        data = {
+            "date": datetime.now().isoformat(),
+            "role": metadata.get('role', ''),
+            "status": "Completed",
+            "jobs_found": len(jobs)
+        }
+        with telemetry.span("upload", collection="job_reports"):
+            record_id = get_artifact_store().publish(content_hash, "job_reports", data, [
+                ('report_pdf', pdf_path, 'application/pdf'),
+                ('report_html', html_path, 'text/html'),
+            ])
+        if record_id:
+            print(f"✅ Report saved to PocketBase: {record_id}")
+
+    # 4. Send Email Notification (a reused report was already sent when it was first stored)
+    if record_id and not existing:
         try:
             receiver = os.getenv("EMAIL_RECEIVER", "desaisyash1000@gmail.com")
             # Construct Download Link: {PB_URL}/api/files/{collection}/{id}/{filename}
-            download_link = f"{PB_URL}/api/files/job_reports/{record_id}/{os.path.basename(pdf_path)}"
+            download_link = pbc.file_url("job_reports", record_id, os.path.basename(pdf_path))
             
-            # Render Email Template
-            email_template = env.get_template('email_marketing.html')
-            email_html = email_template.render({
+            item = {
                 "title": "Mission Report Ready",
                 "message": f"Hunter has completed the scan. Found {len(jobs)} active opportunities matching your profile ({metadata.get('role')}).",
                 "stats": {"Role": metadata.get('role'), "Jobs": len(jobs), "Status": "Success"},
                 "download_link": download_link,
-                "receiver": receiver
-            })
-            
-            email_service.send_notification(
-                receiver_email=receiver,
-                subject=f"🚀 Mission Report: {len(jobs)} Jobs Found",
-                html_content=email_html
-            )
+            }
+            email_service = get_email_service()
+            if email_service.digest_enabled:
+                # Merged with the rest of today's reports by send_report_digest()
+                email_service.add_to_digest(receiver, item)
+            else:
+                # Render Email Template; the outbox sends it in the background
+                email_html = render_html('email_marketing.html', {**item, "receiver": receiver})
+                email_service.queue_notification(
+                    receiver_email=receiver,
+                    subject=f"🚀 Mission Report: {len(jobs)} Jobs Found",
+                    html_content=email_html
+                )
         except Exception as e:
             print(f"⚠️ Failed to send email: {e}")
 
@@ -132,16 +108,13 @@ def generate_job_report(jobs: list, metadata: dict):
 def generate_resume_pdf(resume_data: dict, job_title: str, style: str = "harvard"):
     """
     Generates a PDF resume based on the AI output.
+    Returns None when the PDF could not be rendered (nothing is uploaded).
     """
-    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-    
     # Select Template
     template_name = 'resume_template_creative.html' if style == 'creative' else 'resume_template.html'
-    template = env.get_template(template_name)
     
     # 1. Render HTML
     context = resume_data # Expected keys: summary, skills, projects, certifications
-    html_content = template.render(context)
     
     # Files
     date_str = datetime.now().strftime("%Y-%m-%d")
@@ -149,41 +122,41 @@ def generate_resume_pdf(resume_data: dict, job_title: str, style: str = "harvard
     pdf_path = os.path.join(OUTPUT_DIR, f"{filename_base}.pdf")
     html_path = os.path.join(OUTPUT_DIR, f"{filename_base}.html")
     
-    with open(html_path, "w", encoding='utf-8') as f:
-        f.write(html_content)
-        
-    with open(pdf_path, "wb") as pdf_file:
-        pisa_status = pisa.CreatePDF(html_content, dest=pdf_file)
+    with telemetry.span("render_html", template="resume"):
+        write_html(template_name, context, html_path)
 
-    # 2. Upload to PB (Targeting 'resume_generated' collection)
-    import requests
-    record_id = None
-    try:
-        with open(pdf_path, 'rb') as f_pdf:
-            # Field name in PB is 'resume_pdf'
-            files = [('resume_pdf', (os.path.basename(pdf_path), f_pdf, 'application/pdf'))]
-            data = {
-                "date": datetime.now().isoformat(),
-                "role": f"{job_title} ({style})",
-                "status": "Generated"
-            }
-            api_url = f"{PB_URL}/api/collections/resume_generated/records"
-            response = requests.post(api_url, data=data, files=files)
-            if response.status_code < 300:
-                record_id = response.json().get('id')
-            else:
-                 print(f"Failed to upload resume: {response.text}")
-    except Exception as e:
-        print(f"Error uploading resume: {e}")
+    content_hash = hash_file(html_path, extra=f"resume_generated:{job_title}:{style}")
+    existing = get_artifact_store().find(content_hash)
+    if existing:
+        if html_path not in existing["paths"]:
+            os.remove(html_path)
+        pdf_path, html_path = existing["paths"]
+        record_id = existing["record_id"]
+        print(f"♻️ Identical resume already stored: {record_id}")
+    else:
+        with telemetry.span("render_pdf", template="resume"):
+            rendered = render_pdf(template_name, context, pdf_path)
+        if not rendered:
+            print("Error generating resume PDF")
+            return None # Don't upload or index a broken PDF
+
+        # 2. Upload to PB (Targeting 'resume_generated' collection; field name is 'resume_pdf')
+        data = {
+            "date": datetime.now().isoformat(),
+            "role": f"{job_title} ({style})",
+            "status": "Generated"
+        }
+        with telemetry.span("upload", collection="resume_generated"):
+            record_id = get_artifact_store().publish(content_hash, "resume_generated", data,
+                                               [('resume_pdf', pdf_path, 'application/pdf')], local_only=[html_path])
 
     # 3. Send Email Notification
     if record_id:
         try:
             receiver = os.getenv("EMAIL_RECEIVER", "desaisyash1000@gmail.com")
-            download_link = f"{PB_URL}/api/files/resume_generated/{record_id}/{os.path.basename(pdf_path)}"
+            download_link = pbc.file_url("resume_generated", record_id, os.path.basename(pdf_path))
             
-            email_template = env.get_template('email_marketing.html')
-            email_html = email_template.render({
+            email_html = render_html('email_marketing.html', {
                 "title": "Resume Generated",
                 "message": f"Your tailored resume for '{job_title}' is ready. Optimized for ATS parsing and readability.",
                 "stats": {"Target Role": job_title, "Style": style, "Type": "PDF"},
@@ -191,7 +164,7 @@ def generate_resume_pdf(resume_data: dict, job_title: str, style: str = "harvard
                 "receiver": receiver
             })
             
-            email_service.send_notification(
+            get_email_service().queue_notification(
                 receiver_email=receiver,
                 subject=f"📄 Resume Ready: {job_title}",
                 html_content=email_html
@@ -204,3 +177,22 @@ def generate_resume_pdf(resume_data: dict, job_title: str, style: str = "harvard
         "pb_record_id": record_id,
         "collection_id": "resume_generated" # return collection name for frontend link construction
     }
+
+def _render_digest(receiver: str, items: list):
+    total_jobs = sum(int((item.get("stats") or {}).get("Jobs") or 0) for item in items)
+    email_html = render_html('email_marketing.html', {
+        "title": "Daily Mission Digest",
+        "message": f"{len(items)} hunt report(s) completed today with {total_jobs} opportunities in total.",
+        "stats": {"Reports": len(items), "Jobs": total_jobs, "Status": "Success"},
+        "items": [{**item, "title": (item.get("stats") or {}).get("Role") or item["title"]} for item in items],
+        "receiver": receiver
+    })
+    return f"🚀 Daily Digest: {total_jobs} Jobs across {len(items)} Reports", email_html
+
+def send_report_digest() -> int:
+    """
+    Sends the pending hunt report notifications as one digest email per receiver.
+    Returns the number of digest emails sent.
+    """
+    return get_email_service().send_digest(_render_digest)
+
@@ -1,63 +1,30 @@
 from phi.agent import Agent
 from phi.model.groq import Groq
-from pocketbase import PocketBase
 import os
+import json
 from dotenv import load_dotenv
+from .services import http_client
+from .portfolio import portfolio_snapshot
+from .preprocess import estimate_tokens
+from . import schemas
+from . import telemetry
 
 load_dotenv()
 
-# Initialize PB
-pb = PocketBase("http://127.0.0.1:8090")
+# Follow-up requests for resume sections missing from the model's answer (0 = fail instead)
+RESUME_REPAIR_ATTEMPTS = int(os.getenv("RESUME_REPAIR_ATTEMPTS", "1"))
 
 def fetch_user_portfolio():
     """
-    Fetches all relevant user data from PocketBase to build the 'Context'.
+    Returns the user's portfolio 'Context' (projects, certifications, skills)
+    from the in-process snapshot, which PocketBase realtime keeps up to date.
     """
-    context = {"projects": [], "certifications": [], "skills": []}
-    
-    try:
-        # 1. Projects
-        try:
-            projects = pb.collection('projects').get_list(1, 20, {"sort": "-created"})
-            for p in projects.items:
-                context["projects"].append({
-                    "name": getattr(p, "project_name", "Untitled"),
-                    "tech_stack": getattr(p, "tech_stack", ""),
-                    "description": getattr(p, "description", ""),
-                    "category": getattr(p, "category", "")
-                })
-        except Exception as e:
-             print(f"Warning: Could not fetch projects (Collection might be missing): {e}")
-
-        # 2. Certifications
-        try:
-            certs = pb.collection('certifications').get_list(1, 20)
-            for c in certs.items:
-                context["certifications"].append({
-                    "name": getattr(c, "certificate_name", "Untitled"),
-                    "provider": getattr(c, "provider", ""),
-                    "date": getattr(c, "completion_date", "")
-                })
-        except Exception as e:
-             print(f"Warning: Could not fetch certifications: {e}")
-            
-        # 3. Resume Skills (Ideally from a structured collection, or we infer from projects)
-        # For now, we aggregate unique tech stacks
-        all_tech = set()
-        for p in context["projects"]:
-            if p["tech_stack"]:
-                skills = [s.strip() for s in p["tech_stack"].split(',')]
-                all_tech.update(skills)
-        context["skills"] = list(all_tech)
-        
-    except Exception as e:
-        print(f"Error fetching portfolio from PB: {e}")
-        
-    return context
+    return portfolio_snapshot.get()
 
 def get_resume_agent():
     return Agent(
-        model=Groq(id="llama-3.3-70b-versatile", api_key=os.getenv("GROQ_API_KEY")),
+        model=Groq(id="llama-3.3-70b-versatile", api_key=os.getenv("GROQ_API_KEY"),
+                   client_params=http_client.SDK_CLIENT_PARAMS),
         description="You are an expert ATS Resume Writer & Career Coach.",
         instructions=[
             "You will be given a Candidate's Portfolio (Projects, Skills, Certs) and a Target Job Description.",
@@ -67,7 +34,7 @@ def get_resume_agent():
             "2. SKILLS: Select the top 10 skills from the portfolio that match the JD.",
             "3. PROJECTS: Select the 3 most relevant projects. Rewrite their descriptions to emphasize impacts & results relevant to the JD.",
             "4. EXPERIENCE: If usually empty for freshers, focus heavily on Projects.",
-            "5. OUTPUT FORMAT: Return valid JSON with keys: 'summary', 'skills' (list), 'projects' (list of objects with name, tech, bullet_points), 'certifications'.",
+            "5. OUTPUT FORMAT: Return valid JSON with keys: 'summary', 'skills' (list), 'projects' (list of objects with name, tech_stack, bullet_points), 'certifications' (list of objects with name, provider, date).",
         ],
         show_tool_calls=False,
         markdown=False # We want JSON
@@ -78,7 +45,8 @@ def generate_tailored_resume(job_description: str):
     Orchestrates the resume generation process.
     """
     print("📝 Resume Agent: Fetching Portfolio...")
-    portfolio = fetch_user_portfolio()
+    with telemetry.span("portfolio"):
+        portfolio = fetch_user_portfolio()
     
     print("🧠 Resume Agent: Analyzing JD & Generating Content...")
     agent = get_resume_agent()
@@ -94,7 +62,92 @@ def generate_tailored_resume(job_description: str):
     """
     
     try:
-        response = agent.run(prompt)
+        with telemetry.span("llm_resume"):
+            response = http_client.call_with_retry("api.groq.com", agent.run, prompt)
+        telemetry.record_tokens("resume", estimate_tokens(prompt), estimate_tokens(response.content or ""))
         return response.content
     except Exception as e:
         return f"Error generating resume: {e}"
+
+def complete_resume(job_description: str, resume: dict, missing: list):
+    """
+    Asks the model for just the missing resume sections (not the whole resume
+    again) and merges them in.
+
+    Returns:
+        tuple: (resume, missing) after the merge.
+    """
+    portfolio = fetch_user_portfolio()
+    written = {name: value for name, value in resume.items() if value}
+    prompt = f"""
+    CANDIDATE PORTFOLIO:
+    {portfolio}
+    
+    TARGET JOB DESCRIPTION:
+    {job_description}
+    
+    ALREADY WRITTEN (do not repeat):
+    {json.dumps(written)}
+    
+    Action: Return ONLY a JSON object with the keys {', '.join(repr(name) for name in missing)}.
+    """
+    try:
+        with telemetry.span("llm_resume_repair", fields=",".join(missing)):
+            response = http_client.call_with_retry("api.groq.com", get_resume_agent().run, prompt)
+        telemetry.record_tokens("resume_repair", estimate_tokens(prompt), estimate_tokens(response.content or ""))
+        with telemetry.span("json_parse"):
+            patch, _, _ = schemas.parse_resume(response.content or "")
+    except Exception as e:
+        print(f"⚠️ Resume Agent: follow-up for {missing} failed: {e}")
+        return resume, missing
+
+    resume = {**resume, **{name: patch[name] for name in missing if patch[name]}}
+    return resume, [name for name in missing if not resume[name]]
+
+def build_resume(job_description: str, job_title: str, style: str = "harvard", progress=None):
+    """
+    Full resume pipeline: AI content generation, JSON parsing and PDF rendering.
+    Malformed JSON is repaired locally and sections that are still missing are
+    asked for on their own (see complete_resume).
+    progress(event, **data) is called between stages when given.
+    
+    Returns:
+        dict: {"data": <generate_resume_pdf result>, "preview": <parsed resume JSON>}
+    """
+    from .reporting import generate_resume_pdf
+    emit = progress or (lambda event, **data: None)
+
+    with telemetry.trace_run("resume", style=style):
+        # 1. Generate Content (AI)
+        emit("generating_content")
+        raw_content = generate_tailored_resume(job_description)
+        print(f"AI Response Preview: {raw_content[:200]}...") # Debug log
+    
+        # Parse JSON from AI response (fences, preamble and syntax slips are repaired)
+        try:
+            with telemetry.span("json_parse"):
+                resume_data, missing, repaired = schemas.parse_resume(raw_content)
+        except ValueError:
+            print(f"JSON Decode Error! Raw content was: {raw_content}")
+            telemetry.structured_output.inc(kind="resume", outcome="failed")
+            raise ValueError("AI did not return valid JSON. Please try again.")
+        outcome = "repaired" if repaired else "clean"
+
+        for _ in range(RESUME_REPAIR_ATTEMPTS):
+            if not missing:
+                break
+            print(f"🩹 Resume Agent: asking again for {', '.join(missing)}...")
+            emit("completing_content", missing=missing)
+            resume_data, missing = complete_resume(job_description, resume_data, missing)
+            outcome = "completed"
+        if missing:
+            telemetry.structured_output.inc(kind="resume", outcome="failed")
+            raise ValueError(f"AI response was missing {', '.join(missing)}. Please try again.")
+        telemetry.structured_output.inc(kind="resume", outcome=outcome)
+
+        # 2. Generate PDF with Style
+        emit("rendering_pdf")
+        result = generate_resume_pdf(resume_data, job_title, style=style)
+        if result is None:
+            raise ValueError("Resume PDF could not be generated. Please try again.")
+        return {"data": result, "preview": resume_data}
@@ -1,27 +1,143 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from .job_hunter import run_job_hunt
+from datetime import datetime, timedelta
+from .profiles import load_hunt_profiles
+from .services.email_service import EMAIL_DIGEST
+from . import leader
 import asyncio
+import os
+
+# Daily reports only list jobs first seen since the previous hunt
+SCHEDULED_HUNT_NEW_ONLY = os.getenv("SCHEDULED_HUNT_NEW_ONLY", "true").lower() == "true"
+# Global cap on concurrent scrapes across all profiles in one window
+SCHEDULER_MAX_CONCURRENCY = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "4"))
+
+DAILY_HUNT_HOUR = int(os.getenv("DAILY_HUNT_HOUR", "8"))
+DAILY_HUNT_MINUTE = int(os.getenv("DAILY_HUNT_MINUTE", "0"))
+# Evening digest of the day's hunt reports (EMAIL_DIGEST=true)
+EMAIL_DIGEST_HOUR = int(os.getenv("EMAIL_DIGEST_HOUR", "20"))
+EMAIL_DIGEST_MINUTE = int(os.getenv("EMAIL_DIGEST_MINUTE", "0"))
+# A missed daily run is caught up when the new leader starts within this many hours of it
+CATCH_UP_WINDOW_HOURS = float(os.getenv("SCHEDULER_CATCH_UP_HOURS", "12"))
 
 scheduler = AsyncIOScheduler()
+lease = leader.LeaderLease("scheduler")
+
+def run_scheduled_hunts():
+    """
+    Runs every saved hunt profile, sharing scrapes of identical targets.
+    """
+    from .job_hunter import run_profile_hunts
+    profiles = load_hunt_profiles()
+    print(f"⏰ JobOs Scheduler: Hunting for {len(profiles)} profile(s)")
+    return run_profile_hunts(profiles, concurrency=SCHEDULER_MAX_CONCURRENCY, new_only=SCHEDULED_HUNT_NEW_ONLY)
+
+def _last_daily_fire(now: datetime = None) -> datetime:
+    now = now or datetime.now()
+    fire = now.replace(hour=DAILY_HUNT_HOUR, minute=DAILY_HUNT_MINUTE, second=0, microsecond=0)
+    return fire if fire <= now else fire - timedelta(days=1)
+
+def run_daily_hunt(catch_up: bool = False):
+    """
+    Leader-only wrapper for the daily hunt. Each occurrence is claimed in the run
+    history first, so it runs once even if several workers fire at the same time.
+    """
+    if not lease.is_leader:
+        print("⏰ JobOs Scheduler: Not the leader, skipping daily hunt.")
+        return
+    scheduled_for = _last_daily_fire().timestamp()
+    run_id = leader.claim_run("daily_job_hunt", scheduled_for, lease.holder, catch_up=catch_up)
+    if run_id is None:
+        print("⏰ JobOs Scheduler: Daily hunt already ran for this window.")
+        return
+    try:
+        run_scheduled_hunts()
+        leader.finish_run(run_id, "succeeded")
+    except Exception as e:
+        print(f"⏰ JobOs Scheduler: Daily hunt failed: {e}")
+        leader.finish_run(run_id, "failed", str(e))
+
+def run_email_digest():
+    """
+    Leader-only: sends the day's report digest once per occurrence.
+    """
+    if not lease.is_leader:
+        return
+    from .reporting import send_report_digest
+    now = datetime.now()
+    fire = now.replace(hour=EMAIL_DIGEST_HOUR, minute=EMAIL_DIGEST_MINUTE, second=0, microsecond=0)
+    run_id = leader.claim_run("email_digest", fire.timestamp(), lease.holder)
+    if run_id is None:
+        return
+    try:
+        sent = send_report_digest()
+        print(f"📬 JobOs Scheduler: Sent {sent} digest email(s)")
+        leader.finish_run(run_id, "succeeded")
+    except Exception as e:
+        print(f"📬 JobOs Scheduler: Digest failed: {e}")
+        leader.finish_run(run_id, "failed", str(e))
+
+def _heartbeat():
+    """
+    Renews (or tries to take) the scheduler lease. On becoming leader, catches up
+    a daily run that was missed while no leader was alive.
+    """
+    was_leader = lease.is_leader
+    if not lease.try_acquire() or was_leader:
+        return
+    print(f"👑 JobOs Scheduler: This worker is now the leader ({lease.holder})")
+    last_fire = _last_daily_fire()
+    if datetime.now() - last_fire <= timedelta(hours=CATCH_UP_WINDOW_HOURS):
+        scheduler.add_job(run_daily_hunt, kwargs={"catch_up": True}, id="daily_job_hunt_catch_up", replace_existing=True)
 
 def start_scheduler():
     """
     Starts the background scheduler.
+    Every worker runs it, but only the holder of the SQLite lease executes jobs.
     """
     # Daily Trigger at 8:00 AM
-    trigger = CronTrigger(hour=8, minute=0)
+    trigger = CronTrigger(hour=DAILY_HUNT_HOUR, minute=DAILY_HUNT_MINUTE)
     
     # Add the job
     scheduler.add_job(
-        run_job_hunt,
+        run_daily_hunt,
         trigger=trigger,
         id="daily_job_hunt",
-        replace_existing=True
+        replace_existing=True,
+        misfire_grace_time=3600,
+        coalesce=True
+    )
+
+    if EMAIL_DIGEST:
+        scheduler.add_job(
+            run_email_digest,
+            trigger=CronTrigger(hour=EMAIL_DIGEST_HOUR, minute=EMAIL_DIGEST_MINUTE),
+            id="email_digest",
+            replace_existing=True,
+            misfire_grace_time=3600,
+            coalesce=True
+        )
+
+    # Leader election: renew well inside the lease TTL
+    scheduler.add_job(
+        _heartbeat,
+        'interval',
+        seconds=max(5, lease.ttl // 3),
+        id="scheduler_lease_heartbeat",
+        replace_existing=True,
+        next_run_time=datetime.now()
     )
     
     # For Testing: Run it once 10 seconds after startup so the user sees it working
-    # scheduler.add_job(run_job_hunt, 'date', run_date=datetime.now() + timedelta(seconds=10))
+    # scheduler.add_job(run_scheduled_hunts, 'date', run_date=datetime.now() + timedelta(seconds=10))
     
     scheduler.start()
-    print("⏰ JobOs Scheduler: Active (Daily at 8:00 AM)")
+    print(f"⏰ JobOs Scheduler: Active (Daily at {DAILY_HUNT_HOUR:02d}:{DAILY_HUNT_MINUTE:02d}, leader-elected)")
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    lease.release()
+
+def scheduler_status() -> dict:
+    return {"leader": lease.current(), "is_leader": lease.is_leader, "runs": leader.recent_runs()}
@@ -0,0 +1,230 @@
+import os
+import time
+import hashlib
+import threading
+from datetime import datetime, timezone
+from ..db import BACKEND_DIR, db_path, connect
+from . import pocketbase_client as pbc
+
+ARTIFACT_DB = db_path(os.getenv("ARTIFACT_DB", "artifacts.db"))
+OUTPUT_DIR = os.getenv("REPORTS_DIR", os.path.join(BACKEND_DIR, "generated_reports"))
+# Retention: anything older than MAX_AGE_DAYS, beyond MAX_COUNT per collection,
+# or beyond MAX_BYTES of local files (least recently used first) is deleted
+MAX_AGE_DAYS = int(os.getenv("ARTIFACT_MAX_AGE_DAYS", "30"))
+MAX_COUNT = int(os.getenv("ARTIFACT_MAX_COUNT", "200"))
+MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(500 * 1024 * 1024)))
+GC_INTERVAL = int(os.getenv("ARTIFACT_GC_INTERVAL", "3600"))
+# Opt-in sweeps of things the index never wrote: old unindexed files in OUTPUT_DIR
+# and old records in the managed PocketBase collections
+SWEEP_ORPHANS = os.getenv("ARTIFACT_SWEEP_ORPHANS", "false").lower() == "true"
+SWEEP_REMOTE = os.getenv("ARTIFACT_SWEEP_REMOTE", "false").lower() == "true"
+MANAGED_COLLECTIONS = ("job_reports", "resume_generated")
+
+
+def hash_file(path: str, extra: str = "") -> str:
+    h = hashlib.sha256(extra.encode("utf-8"))
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _remove(path: str) -> int:
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
+
+
+class ArtifactStore:
+    """
+    Index of generated reports/resumes keyed by a hash of their rendered HTML.
+
+    An identical artifact (same collection, same content) is uploaded to PocketBase
+    once; later requests reuse its record and local files. A retention policy
+    (age, count, bytes) is applied to the indexed artifacts (local files and
+    records); files and records the index didn't write are only swept when
+    ARTIFACT_SWEEP_ORPHANS / ARTIFACT_SWEEP_REMOTE are set.
+    """
+
+    def __init__(self, path: str = ARTIFACT_DB):
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+        self.stats = {"published": 0, "deduplicated": 0, "gc_deleted": 0, "gc_bytes": 0}
+        self.conn = connect(path)
+        with self._lock, self.conn:
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS artifacts (
+                    hash TEXT PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    record_id TEXT,
+                    paths TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )"""
+            )
+
+    def find(self, content_hash: str):
+        """
+        Returns:
+            dict: {record_id, paths} of an uploaded artifact whose local files still exist, or None.
+        """
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT record_id, paths FROM artifacts WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if not row or not row[0]:
+                return None # Unknown, or its upload failed and should be retried
+            paths = row[1].split("\n")
+            if not all(os.path.exists(p) for p in paths):
+                self.conn.execute("DELETE FROM artifacts WHERE hash = ?", (content_hash,))
+                return None
+            self.conn.execute("UPDATE artifacts SET last_used_at = ? WHERE hash = ?", (time.time(), content_hash))
+            self.stats["deduplicated"] += 1
+        return {"record_id": row[0], "paths": paths}
+
+    def publish(self, content_hash: str, collection: str, data: dict, files: list, local_only: list = None):
+        """
+        Uploads a new artifact (streamed from disk) and indexes it.
+
+        Args:
+            content_hash (str): Hash from hash_file().
+            collection (str): PocketBase collection.
+            data (dict): Record fields.
+            files (list): [(field, path, content_type)] to upload.
+            local_only (list): Paths kept with the artifact but not uploaded (e.g. the HTML source).
+
+        Returns:
+            str: The PocketBase record id, or None if the upload failed (files stay indexed locally).
+        """
+        record_id = None
+        handles = [open(path, "rb") for _, path, _ in files]
+        try:
+            multipart = [(field, (os.path.basename(path), fobj, mime)) for (field, path, mime), fobj in zip(files, handles)]
+            record_id = pbc.create_record(collection, data, multipart).get("id")
+        except Exception as e:
+            print(f"⚠️ Failed to upload to PocketBase (Ensure '{collection}' collection exists): {e}")
+        finally:
+            for fobj in handles:
+                fobj.close()
+
+        paths = [path for _, path, _ in files] + list(local_only or [])
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO artifacts (hash, collection, record_id, paths, size, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, collection, record_id, "\n".join(paths), sum(os.path.getsize(p) for p in paths), now, now),
+            )
+            self.stats["published"] += 1
+        self.maybe_gc()
+        return record_id
+
+    # --- Retention ---
+
+    def maybe_gc(self):
+        if time.time() - self._last_gc < GC_INTERVAL:
+            return
+        self._last_gc = time.time()
+        threading.Thread(target=self.gc, daemon=True).start()
+
+    def _expired_locked(self, cutoff: float) -> list:
+        rows = self.conn.execute(
+            "SELECT hash, collection, record_id, paths, size, last_used_at FROM artifacts ORDER BY last_used_at DESC"
+        ).fetchall()
+        doomed = []
+        kept_per_collection = {}
+        kept_bytes = 0
+        for row in rows:
+            collection, size, last_used = row[1], row[4], row[5]
+            count = kept_per_collection.get(collection, 0)
+            if last_used < cutoff or count >= MAX_COUNT or kept_bytes + size > MAX_BYTES:
+                doomed.append(row)
+            else:
+                kept_per_collection[collection] = count + 1
+                kept_bytes += size
+        return doomed
+
+    def gc(self) -> dict:
+        """
+        Applies the retention policy. Safe to call at any time.
+
+        Returns:
+            dict: {"artifacts": n, "orphans": n, "remote_records": n, "bytes": n}
+        """
+        cutoff = time.time() - MAX_AGE_DAYS * 86400
+        result = {"artifacts": 0, "orphans": 0, "remote_records": 0, "bytes": 0}
+        with self._lock:
+            doomed = self._expired_locked(cutoff)
+            referenced = set()
+            for row in self.conn.execute("SELECT paths FROM artifacts"):
+                referenced.update(row[0].split("\n"))
+
+        # 1. Indexed artifacts past the policy: local files + their record
+        for content_hash, collection, record_id, paths, _, _ in doomed:
+            for path in paths.split("\n"):
+                result["bytes"] += _remove(path)
+                referenced.discard(path)
+            if record_id:
+                try:
+                    pbc.delete_record(collection, record_id)
+                    result["remote_records"] += 1
+                except pbc.PocketBaseError as e:
+                    if e.status_code != 404:
+                        print(f"⚠️ Could not delete {collection}/{record_id}: {e}")
+                        continue
+                except Exception as e:
+                    print(f"⚠️ Could not delete {collection}/{record_id}: {e}")
+                    continue
+            with self._lock, self.conn:
+                self.conn.execute("DELETE FROM artifacts WHERE hash = ?", (content_hash,))
+            result["artifacts"] += 1
+
+        # 2. Old local files that were never indexed (e.g. written before the store existed)
+        if SWEEP_ORPHANS and os.path.isdir(OUTPUT_DIR):
+            for name in os.listdir(OUTPUT_DIR):
+                path = os.path.join(OUTPUT_DIR, name)
+                if path not in referenced and os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                    result["bytes"] += _remove(path)
+                    result["orphans"] += 1
+
+        # 3. Old records in the managed collections that the index doesn't know about
+        # (records still indexed are kept: dedup reuses them however old they are)
+        stamp = datetime.fromtimestamp(cutoff, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        for collection in MANAGED_COLLECTIONS if SWEEP_REMOTE else ():
+            try:
+                with self._lock:
+                    indexed = {row[0] for row in self.conn.execute(
+                        "SELECT record_id FROM artifacts WHERE collection = ? AND record_id IS NOT NULL", (collection,))}
+                old = pbc.list_records(collection, filter_str=f'created < "{stamp}"', fields="id")
+                for record in old:
+                    if record["id"] in indexed:
+                        continue
+                    pbc.delete_record(collection, record["id"])
+                    result["remote_records"] += 1
+            except Exception as e:
+                print(f"⚠️ Retention sweep of '{collection}' failed: {e}")
+
+        self.stats["gc_deleted"] += result["artifacts"] + result["orphans"]
+        self.stats["gc_bytes"] += result["bytes"]
+        if any(result.values()):
+            print(f"🧹 Artifact GC: {result}")
+        return result
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            count, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+            return {"artifacts": count, "bytes": size, **self.stats}
+
+
+_artifact_store = None
+_artifact_store_lock = threading.Lock()
+
+def get_artifact_store() -> ArtifactStore:
+    """The shared ArtifactStore, built on first use rather than at import (it opens artifacts.db)."""
+    global _artifact_store
+    with _artifact_store_lock:
+        if _artifact_store is None:
+            _artifact_store = ArtifactStore()
+        return _artifact_store
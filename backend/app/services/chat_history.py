@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..db import db_path, connect
+from ..preprocess import estimate_tokens
+
+CHAT_HISTORY_DB = db_path(os.getenv("CHAT_HISTORY_DB", "brain.db"))
+# Recent turns sent verbatim with every message
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1500"))
+# Older turns are folded into the summary once this many tokens have piled up beyond the window
+CHAT_SUMMARY_BATCH_TOKENS = int(os.getenv("CHAT_SUMMARY_BATCH_TOKENS", "1000"))
+# Length the rolling summary is kept to
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))
+# Longer replies (tables, file dumps) are clipped before they are stored
+CHAT_TURN_MAX_CHARS = int(os.getenv("CHAT_TURN_MAX_CHARS", "4000"))
+
+
+class ChatHistory:
+    """
+    Per-session chat memory: a token-budgeted window of recent turns plus a
+    rolling summary of everything older, in SQLite.
+
+    A prompt never carries more than the window and the summary, so its size
+    (and time to first token) stays flat however long a session runs. Each turn
+    is one row keyed by (session_id, seq); reads only touch the unsummarized
+    tail, never the whole session. Turns that fall out of the window are folded
+    into the summary in the background, one batch at a time.
+    """
+
+    def __init__(self, path: str = CHAT_HISTORY_DB, window_tokens: int = CHAT_HISTORY_TOKENS,
+                 batch_tokens: int = CHAT_SUMMARY_BATCH_TOKENS):
+        self.window_tokens = window_tokens
+        self.batch_tokens = batch_tokens
+        self._lock = threading.Lock()
+        self._summarizing = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-summary")
+        self.stats = {"turns": 0, "summaries": 0, "summary_errors": 0}
+
+        self.conn = connect(path)
+        with self._lock, self.conn:
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS chat_turns (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    user TEXT NOT NULL,
+                    assistant TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                )"""
+            )
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS chat_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL DEFAULT '',
+                    summarized_seq INTEGER NOT NULL DEFAULT 0,
+                    last_seq INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_imports (source TEXT PRIMARY KEY, turns INTEGER NOT NULL, imported_at REAL NOT NULL)"
+            )
+        self._import_agent_sessions()
+
+    def _import_agent_sessions(self):
+        """
+        One-time import of the history phi's SqlAgentStorage kept in the
+        agent_sessions table (the chat agent's storage before this class).
+
+        Each stored run becomes a turn of the frontend session it was sent with;
+        sessions longer than the window get their rolling summary seeded in the
+        background. The old table is left as it is.
+        """
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            if self.conn.execute("SELECT 1 FROM chat_imports WHERE source = 'agent_sessions'").fetchone():
+                return
+            if not self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'agent_sessions'"
+            ).fetchone():
+                return
+            turns = []
+            for agent_session_id, memory in self.conn.execute("SELECT session_id, memory FROM agent_sessions"):
+                try:
+                    runs = (json.loads(memory) if isinstance(memory, str) else memory or {}).get("runs") or []
+                except ValueError:
+                    continue
+                for run in runs:
+                    message, response = run.get("message") or {}, run.get("response") or {}
+                    user, assistant = message.get("content"), response.get("content")
+                    if not isinstance(user, str) or not isinstance(assistant, str):
+                        continue
+                    # run(session_id=...) only reached the message, not the agent's own session
+                    sent = [m for m in response.get("messages") or [] if m.get("role") == "user" and m.get("session_id")]
+                    session_id = str(sent[-1]["session_id"]) if sent else agent_session_id
+                    turns.append((message.get("created_at") or 0, session_id, user, assistant[:CHAT_TURN_MAX_CHARS]))
+            turns.sort()
+            sessions = {}
+            for created_at, session_id, user, assistant in turns:
+                seq = self.conn.execute(
+                    """INSERT INTO chat_turns (session_id, seq, user, assistant, tokens, created_at)
+                       SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ?, ? FROM chat_turns WHERE session_id = ?
+                       RETURNING seq""",
+                    (session_id, user, assistant, estimate_tokens(user) + estimate_tokens(assistant), created_at, session_id),
+                ).fetchone()[0]
+                sessions[session_id] = (seq, created_at)
+            for session_id, (seq, created_at) in sessions.items():
+                self.conn.execute(
+                    """INSERT INTO chat_sessions (session_id, summary, summarized_seq, last_seq, updated_at)
+                       VALUES (?, '', 0, ?, ?)
+                       ON CONFLICT(session_id) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq)""",
+                    (session_id, seq, created_at),
+                )
+            self.conn.execute(
+                "INSERT INTO chat_imports (source, turns, imported_at) VALUES ('agent_sessions', ?, ?)",
+                (len(turns), time.time()),
+            )
+            oversized = [
+                session_id for session_id, in self.conn.execute(
+                    """SELECT t.session_id FROM chat_turns t JOIN chat_sessions s USING (session_id)
+                       WHERE t.seq > s.summarized_seq GROUP BY t.session_id HAVING SUM(t.tokens) > ?""",
+                    (self.window_tokens,),
+                ) if session_id in sessions
+            ]
+            self._summarizing.update(oversized)
+        print(f"🧠 [ChatHistory] Imported {len(turns)} turns of {len(sessions)} sessions from agent_sessions")
+        for session_id in oversized:
+            self._executor.submit(self._summarize, session_id)
+
+    def _session(self, session_id: str):
+        return self.conn.execute(
+            "SELECT summary, summarized_seq, last_seq FROM chat_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone() or ("", 0, 0)
+
+    def _pending(self, session_id: str, summarized_seq: int):
+        """Cursor over the unsummarized turns, newest first (read lazily, stop early)."""
+        return self.conn.execute(
+            """SELECT seq, user, assistant, tokens FROM chat_turns
+               WHERE session_id = ? AND seq > ? ORDER BY seq DESC""",
+            (session_id, summarized_seq),
+        )
+
+    def context(self, session_id: str):
+        """
+        History to send with the next message.
+
+        Returns:
+            tuple: (summary, turns) where turns are [(user, assistant)] oldest first,
+            at most window + batch tokens (the batch is folded away before it grows further).
+        """
+        turns = []
+        used = 0
+        with self._lock:
+            summary, summarized_seq, _ = self._session(session_id)
+            for _, user, assistant, tokens in self._pending(session_id, summarized_seq):
+                if used + tokens > self.window_tokens + self.batch_tokens:
+                    break # Summary is behind (e.g. the summarizer failed); drop the oldest
+                turns.append((user, assistant))
+                used += tokens
+        turns.reverse()
+        return summary, turns
+
+    def append(self, session_id: str, user: str, assistant: str):
+        """
+        Stores one exchange and schedules a summary update once the turns beyond
+        the window reach the batch size.
+        """
+        assistant = assistant[:CHAT_TURN_MAX_CHARS]
+        tokens = estimate_tokens(user) + estimate_tokens(assistant)
+        now = time.time()
+        with self._lock, self.conn:
+            # Other workers may write to the same session: take the write lock before
+            # reading, and number the turn from the table itself
+            self.conn.execute("BEGIN IMMEDIATE")
+            summary, summarized_seq, _ = self._session(session_id)
+            seq = self.conn.execute(
+                """INSERT INTO chat_turns (session_id, seq, user, assistant, tokens, created_at)
+                   SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ?, ? FROM chat_turns WHERE session_id = ?
+                   RETURNING seq""",
+                (session_id, user, assistant, tokens, now, session_id),
+            ).fetchone()[0]
+            self.conn.execute(
+                """INSERT INTO chat_sessions (session_id, summary, summarized_seq, last_seq, updated_at)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(session_id) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq),
+                       updated_at = excluded.updated_at""",
+                (session_id, summary, summarized_seq, seq, now),
+            )
+            pending = self.conn.execute(
+                "SELECT COALESCE(SUM(tokens), 0) FROM chat_turns WHERE session_id = ? AND seq > ?",
+                (session_id, summarized_seq),
+            ).fetchone()[0]
+            self.stats["turns"] += 1
+            schedule = pending > self.window_tokens + self.batch_tokens and session_id not in self._summarizing
+            if schedule:
+                self._summarizing.add(session_id)
+        if schedule:
+            self._executor.submit(self._summarize, session_id)
+
+    def _summarize(self, session_id: str):
+        """Folds the turns beyond the window into the session's summary."""
+        from ..agent import summarize_conversation
+        try:
+            with self._lock:
+                summary, summarized_seq, _ = self._session(session_id)
+                rows = self._pending(session_id, summarized_seq).fetchall()
+            kept = 0
+            older = []
+            for row in rows:
+                if older or kept + row[3] > self.window_tokens:
+                    older.append(row)
+                else:
+                    kept += row[3]
+            if not older:
+                return
+            older.reverse()
+            # After an outage, catch up a few batches per call rather than in one huge prompt
+            folded = 0
+            for i, row in enumerate(older):
+                folded += row[3]
+                if folded > 4 * self.batch_tokens and i:
+                    older = older[:i]
+                    break
+            started = time.perf_counter()
+            new_summary = summarize_conversation(summary, [(user, assistant) for _, user, assistant, _ in older],
+                                                 CHAT_SUMMARY_TOKENS)
+            with self._lock, self.conn:
+                self.conn.execute(
+                    "UPDATE chat_sessions SET summary = ?, summarized_seq = ?, updated_at = ? WHERE session_id = ?",
+                    (new_summary, older[-1][0], time.time(), session_id),
+                )
+                self.stats["summaries"] += 1
+            print(f"🧠 [ChatHistory] {session_id}: folded {len(older)} turns into the summary "
+                  f"(~{estimate_tokens(new_summary)} tokens, {time.perf_counter() - started:.2f}s)")
+        except Exception as e:
+            with self._lock:
+                self.stats["summary_errors"] += 1
+            print(f"⚠️ [ChatHistory] Summary update for {session_id} failed: {e}")
+        finally:
+            with self._lock:
+                self._summarizing.discard(session_id)
+
+    def flush(self, timeout: float = None):
+        """Waits for scheduled summary updates to finish."""
+        self._executor.submit(lambda: None).result(timeout=timeout)
+
+    def clear(self, session_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM chat_turns WHERE session_id = ?", (session_id,))
+            self.conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            sessions = self.conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+            return {**self.stats, "sessions": sessions, "window_tokens": self.window_tokens,
+                    "batch_tokens": self.batch_tokens, "summarizing": len(self._summarizing)}
+
+
+chat_history = ChatHistory()
@@ -1,35 +1,54 @@
 import os
-import requests
 import json
+import time
+import queue
+import threading
 from dotenv import load_dotenv
+from . import http_client
+from .. import telemetry
+from ..db import db_path, connect
 
 load_dotenv()
 
+# Messages queued within this window are sent together as one Brevo batch
+EMAIL_BATCH_WINDOW = float(os.getenv("EMAIL_BATCH_WINDOW", "2"))
+EMAIL_BATCH_MAX = min(1000, int(os.getenv("EMAIL_BATCH_MAX", "50"))) # Brevo caps messageVersions at 1000
+# Digest mode: hunt report notifications are stored and sent as one email per day
+EMAIL_DIGEST = os.getenv("EMAIL_DIGEST", "false").lower() == "true"
+EMAIL_DIGEST_DB = db_path(os.getenv("EMAIL_DIGEST_DB", "email_digest.db"))
+
 class EmailService:
     def __init__(self):
         self.api_key = os.getenv("BREVO_API_KEY")
-        self.api_url = "https://api.brevo.com/v3/smtp/email"
+        self.api_url = os.getenv("BREVO_API_URL", "https://api.brevo.com/v3/smtp/email")
         self.sender_email = os.getenv("EMAIL_SENDER", "notification@jobos.online")
         self.sender_name = "JobOs AI"
-        
-        if not self.api_key:
-            print("⚠️ EmailService Warning: BREVO_API_KEY not found in environment variables.")
+        self.digest_enabled = EMAIL_DIGEST
+
+        self.outbox = queue.Queue()
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "batches": 0, "digest_items": 0}
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._digest_conn = None
+        self._digest_lock = threading.Lock()
 
-    def send_notification(self, receiver_email: str, subject: str, html_content: str, attachment: dict = None):
-        """
-        Sends an HTML email using Brevo API.
-        attachment: {"name": "report.pdf", "url": "..."}
-        """
         if not self.api_key:
-            print("❌ Cannot send email: Missing API Key.")
-            return False
+            print("⚠️ EmailService Warning: BREVO_API_KEY not found in environment variables.")
 
+    def _post(self, payload: dict) -> bool:
         headers = {
             "accept": "application/json",
             "api-key": self.api_key,
             "content-type": "application/json"
         }
+        with telemetry.span("email_send", versions=len(payload.get("messageVersions", [])) or 1):
+            response = http_client.request("POST", self.api_url, headers=headers, data=json.dumps(payload), timeout=30)
+        if response.status_code == 201:
+            return True
+        print(f"❌ Failed to send email: {response.status_code} - {response.text}")
+        return False
 
+    def _payload(self, receiver_email: str, subject: str, html_content: str, attachment: dict = None) -> dict:
         payload = {
             "sender": {"name": self.sender_name, "email": self.sender_email},
             "to": [{"email": receiver_email}],
@@ -39,23 +58,191 @@ class EmailService:
 
         # Handle Attachments (Brevo accepts URL or Base64)
         # Ideally we pass a URL. If it's a file path, we might need to handle it differently.
-        # For this implementation, we'll rely on the HTML content containing the download link 
+        # For this implementation, we'll rely on the HTML content containing the download link
         # as it's more reliable for "Marketing" style than large attachments.
         # But if a specific attachment dict is passed with a public URL:
         if attachment and attachment.get('url'):
             payload["attachment"] = [
                 {"url": attachment['url'], "name": attachment.get('name', 'document.pdf')}
             ]
+        return payload
+
+    def send_notification(self, receiver_email: str, subject: str, html_content: str, attachment: dict = None):
+        """
+        Sends an HTML email using Brevo API (blocking).
+        attachment: {"name": "report.pdf", "url": "..."}
+        """
+        if not self.api_key:
+            print("❌ Cannot send email: Missing API Key.")
+            return False
 
         try:
-            response = requests.post(self.api_url, headers=headers, data=json.dumps(payload))
-            
-            if response.status_code == 201:
+            if self._post(self._payload(receiver_email, subject, html_content, attachment)):
                 print(f"✅ Email sent successfully to {receiver_email}")
                 return True
-            else:
-                print(f"❌ Failed to send email: {response.status_code} - {response.text}")
-                return False
+            return False
         except Exception as e:
             print(f"❌ Email Service Error: {str(e)}")
             return False
+
+    def send_batch(self, messages: list) -> int:
+        """
+        Sends many emails in one Brevo call using messageVersions (one version per
+        message, each with its own recipient, subject and HTML). Messages with
+        attachments are sent on their own since versions can't carry attachments.
+
+        Args:
+            messages (list): [{"receiver_email", "subject", "html_content", "attachment"?}]
+
+        Returns:
+            int: Number of messages accepted by Brevo.
+        """
+        if not self.api_key:
+            print(f"❌ Cannot send {len(messages)} email(s): Missing API Key.")
+            return 0
+
+        plain = [m for m in messages if not m.get("attachment")]
+        sent = sum(1 for m in messages if m.get("attachment") and self.send_notification(**m))
+        if len(plain) == 1:
+            return sent + int(self.send_notification(**plain[0]))
+        if not plain:
+            return sent
+
+        first = plain[0]
+        payload = self._payload(first["receiver_email"], first["subject"], first["html_content"])
+        del payload["to"]
+        payload["messageVersions"] = [{
+            "to": [{"email": m["receiver_email"]}],
+            "subject": m["subject"],
+            "htmlContent": m["html_content"],
+        } for m in plain]
+        try:
+            if self._post(payload):
+                print(f"✅ Batch of {len(plain)} emails sent")
+                return sent + len(plain)
+        except Exception as e:
+            print(f"❌ Email Service Error: {str(e)}")
+        return sent
+
+    # --- Outbound queue ---
+
+    def queue_notification(self, receiver_email: str, subject: str, html_content: str, attachment: dict = None):
+        """
+        Queues an email and returns immediately. A background worker batches
+        whatever arrives within EMAIL_BATCH_WINDOW seconds into one Brevo call.
+        """
+        self._ensure_worker()
+        self.outbox.put({"receiver_email": receiver_email, "subject": subject,
+                         "html_content": html_content, "attachment": attachment})
+        self.stats["queued"] += 1
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._drain, name="email-outbox", daemon=True)
+                self._worker.start()
+
+    def _drain(self):
+        while True:
+            batch = [self.outbox.get()]
+            deadline = time.monotonic() + EMAIL_BATCH_WINDOW
+            while len(batch) < EMAIL_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.outbox.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                sent = self.send_batch(batch)
+                self.stats["sent"] += sent
+                self.stats["failed"] += len(batch) - sent
+                self.stats["batches"] += 1
+            except Exception as e:
+                print(f"❌ Email outbox error: {e}")
+                self.stats["failed"] += len(batch)
+            finally:
+                for _ in batch:
+                    self.outbox.task_done()
+
+    def flush(self, timeout: float = 30) -> bool:
+        """Waits for queued emails to be sent. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.outbox.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    # --- Digest ---
+
+    def _digest_db(self):
+        if self._digest_conn is None:
+            self._digest_conn = connect(EMAIL_DIGEST_DB)
+            with self._digest_conn:
+                self._digest_conn.execute(
+                    """CREATE TABLE IF NOT EXISTS digest_items (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        receiver TEXT NOT NULL,
+                        item TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )"""
+                )
+        return self._digest_conn
+
+    def add_to_digest(self, receiver_email: str, item: dict):
+        """
+        Stores a notification ({title, message, stats, download_link}) for the next digest.
+        """
+        with self._digest_lock:
+            conn = self._digest_db()
+            with conn:
+                conn.execute(
+                    "INSERT INTO digest_items (receiver, item, created_at) VALUES (?, ?, ?)",
+                    (receiver_email, json.dumps(item), time.time()),
+                )
+            self.stats["digest_items"] += 1
+
+    def send_digest(self, render) -> int:
+        """
+        Sends one email per receiver merging every pending digest item, then
+        clears the items that were delivered.
+
+        Args:
+            render: fn(receiver, items) -> (subject, html_content)
+
+        Returns:
+            int: Number of digest emails sent.
+        """
+        with self._digest_lock:
+            conn = self._digest_db()
+            rows = conn.execute("SELECT id, receiver, item FROM digest_items ORDER BY id").fetchall()
+        by_receiver = {}
+        for row_id, receiver, item in rows:
+            by_receiver.setdefault(receiver, []).append((row_id, json.loads(item)))
+
+        sent = 0
+        for receiver, entries in by_receiver.items():
+            subject, html_content = render(receiver, [item for _, item in entries])
+            if not self.send_notification(receiver, subject, html_content):
+                continue
+            with self._digest_lock, conn:
+                conn.executemany("DELETE FROM digest_items WHERE id = ?", [(row_id,) for row_id, _ in entries])
+            sent += 1
+        return sent
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "pending": self.outbox.unfinished_tasks, "digest": self.digest_enabled}
+
+
+_email_service = None
+_email_service_lock = threading.Lock()
+
+def get_email_service() -> EmailService:
+    """The shared EmailService, built on first use rather than at import (it reads the Brevo settings and owns the outbox)."""
+    global _email_service
+    with _email_service_lock:
+        if _email_service is None:
+            _email_service = EmailService()
+        return _email_service
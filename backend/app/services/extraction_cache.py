@@ -0,0 +1,81 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from ..db import db_path, connect
+
+EXTRACTION_CACHE_DB = db_path(os.getenv("EXTRACTION_CACHE_DB", "hunt_cache.db"))
+MAX_AGE_DAYS = int(os.getenv("EXTRACTION_CACHE_MAX_AGE_DAYS", "30"))
+
+
+class ExtractionCache:
+    """
+    SQLite cache of parsed job lists, keyed by a hash of the page content slice,
+    the role/location and the parser signature (models, instructions and prompt template).
+
+    Rows written under a different parser signature are purged on startup, so
+    changing the model or its instructions invalidates every cached extraction.
+    """
+
+    def __init__(self, signature: str, path: str = EXTRACTION_CACHE_DB, max_age_days: int = MAX_AGE_DAYS):
+        self.signature = signature
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+        self.conn = connect(path)
+        with self._lock, self.conn:
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS extraction_cache (
+                    key TEXT PRIMARY KEY,
+                    signature TEXT NOT NULL,
+                    jobs TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            purged = self.conn.execute(
+                "DELETE FROM extraction_cache WHERE signature != ? OR created_at < ?",
+                (self.signature, time.time() - self.max_age),
+            ).rowcount
+        if purged:
+            print(f"   [ExtractCache] Purged {purged} stale entries (parser changed or expired).")
+
+    def make_key(self, content: str, role: str, location: str) -> str:
+        h = hashlib.sha256()
+        for part in (self.signature, role or "", location or "", content):
+            h.update(part.encode("utf-8"))
+            h.update(b"\x00")
+        return h.hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT jobs FROM extraction_cache WHERE key = ? AND signature = ?",
+                (key, self.signature),
+            ).fetchone()
+            self.stats["hits" if row else "misses"] += 1
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, jobs: list):
+        payload = json.dumps(jobs, separators=(",", ":"))
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, signature, jobs, created_at) VALUES (?, ?, ?, ?)",
+                (key, self.signature, payload, time.time()),
+            )
+            self.stats["writes"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+def parser_signature(model_id: str, description: str, instructions: list, prompt_template: str = "") -> str:
+    """
+    Fingerprint of everything that shapes the parser's output: models, agent
+    description and instructions, and the per-chunk prompt template.
+    """
+    blob = json.dumps({"model": model_id, "description": description, "instructions": instructions,
+                       "prompt": prompt_template}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
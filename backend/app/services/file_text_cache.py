@@ -0,0 +1,76 @@
+import os
+import time
+import zlib
+import hashlib
+import threading
+from ..db import db_path, connect
+
+FILE_TEXT_CACHE_DB = db_path(os.getenv("FILE_TEXT_CACHE_DB", "file_text_cache.db"))
+MAX_AGE_DAYS = int(os.getenv("FILE_TEXT_CACHE_MAX_AGE_DAYS", "60"))
+
+
+class FileTextCache:
+    """
+    SQLite cache of text extracted from PocketBase files, stored zlib-compressed.
+
+    Keyed by collection/record/filename plus the record's `updated` timestamp, so
+    replacing the file (which bumps `updated`) misses the cache. Each row records
+    whether the whole document was extracted or only enough pages for the budget
+    it was read with; a later call with a bigger budget re-extracts.
+    """
+
+    def __init__(self, path: str = FILE_TEXT_CACHE_DB, max_age_days: int = MAX_AGE_DAYS):
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+        self.conn = connect(path)
+        with self._lock, self.conn:
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS file_text (
+                    key TEXT PRIMARY KEY,
+                    text BLOB NOT NULL,
+                    chars INTEGER NOT NULL,
+                    pages_read INTEGER NOT NULL,
+                    complete INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self.conn.execute("DELETE FROM file_text WHERE accessed_at < ?", (time.time() - self.max_age,))
+
+    @staticmethod
+    def make_key(collection: str, record_id: str, filename: str, updated: str) -> str:
+        blob = "\x00".join((collection, record_id, filename, updated or ""))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, max_chars: int):
+        """
+        Returns:
+            str: Cached text cut to max_chars, or None if missing or extracted with a smaller budget.
+        """
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT text, chars, complete FROM file_text WHERE key = ?", (key,)
+            ).fetchone()
+            if row and (row[2] or row[1] >= max_chars):
+                self.conn.execute("UPDATE file_text SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self.stats["hits"] += 1
+                return zlib.decompress(row[0]).decode("utf-8")[:max_chars]
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, text: str, pages_read: int, complete: bool):
+        payload = zlib.compress(text.encode("utf-8"), 6)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO file_text (key, text, chars, pages_read, complete, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, payload, len(text), pages_read, int(complete), time.time()),
+            )
+            self.stats["writes"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+file_text_cache = FileTextCache()
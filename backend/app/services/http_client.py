@@ -0,0 +1,384 @@
+import os
+import time
+import uuid
+import random
+import threading
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+from .. import telemetry
+
+MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("OUTBOUND_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("OUTBOUND_BACKOFF_MAX", "20"))
+BREAKER_THRESHOLD = int(os.getenv("OUTBOUND_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.getenv("OUTBOUND_BREAKER_RESET", "30"))
+
+# Requests per second and burst size per host; unknown hosts use DEFAULT_LIMIT
+HOST_LIMITS = {
+    "r.jina.ai": (2.0, 4),
+    "api.groq.com": (0.5, 2),     # Free tier is ~30 requests/minute
+    "api.brevo.com": (5.0, 10),
+}
+DEFAULT_LIMIT = (10.0, 20)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Methods that are safe to send twice; others (POST, PATCH) are only retried
+# when the connection was never established, unless the caller opts in
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# For SDK clients (e.g. phi's Groq(client_params=...)): retries are left to
+# call_with_retry, so a failing call isn't retried by both layers
+SDK_CLIENT_PARAMS = {"max_retries": 0}
+
+
+class CircuitOpenError(Exception):
+    """Raised without touching the network while a host's circuit breaker is open."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails fast for `reset_timeout`
+    seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_timeout: float = BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release(self):
+        """Ends a call that says nothing about the host's health (e.g. a 4xx or a local error)."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class HostPolicy:
+    def __init__(self, host: str):
+        rate, burst = HOST_LIMITS.get(host, DEFAULT_LIMIT)
+        self.host = host
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker()
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+
+_policies = {}
+_policies_lock = threading.Lock()
+
+def _policy(host: str) -> HostPolicy:
+    with _policies_lock:
+        if host not in _policies:
+            _policies[host] = HostPolicy(host)
+        return _policies[host]
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+def _new_session() -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+# One keep-alive connection pool shared by every outbound call
+session = _new_session()
+
+def retry_after_seconds(value):
+    """Parses a Retry-After header (delta seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, retry_after=None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, BACKOFF_MAX * 3))
+    return delay
+
+@contextmanager
+def guarded(host: str):
+    """
+    Rate-limits and circuit-breaks one call to `host` made through any client
+    (e.g. an SDK or a streaming response). Only transport errors, timeouts, 429
+    and 5xx count as breaker failures; other exceptions (bad requests, errors
+    raised by the caller's own code) are re-raised without tripping it.
+
+    Raises:
+        CircuitOpenError: If the host's breaker is open.
+    """
+    policy = _policy(host)
+    if not policy.breaker.allow():
+        policy.stats["rejected"] += 1
+        raise CircuitOpenError(f"Circuit open for {host}")
+    policy.bucket.acquire()
+    policy.stats["calls"] += 1
+    started = time.perf_counter()
+    try:
+        yield policy
+    except Exception as e:
+        if _is_retryable_error(e):
+            policy.stats["failures"] += 1
+            policy.breaker.record_failure()
+        else:
+            policy.breaker.release()
+        telemetry.record_http(host, type(e).__name__, time.perf_counter() - started)
+        raise
+    else:
+        policy.breaker.record_success()
+        telemetry.record_http(host, "ok", time.perf_counter() - started)
+
+class MultipartStream:
+    """
+    multipart/form-data body that is read from disk while it is sent, instead of
+    being assembled in memory the way requests does for `files=`. Its length is
+    known up front so PocketBase still gets a Content-Length.
+
+    Args:
+        fields (dict): Plain form fields.
+        files (list): [(field, (filename, fileobj, content_type))] as for requests.
+    """
+
+    CHUNK = 64 * 1024
+
+    def __init__(self, fields: dict, files: list):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.segments = []
+        for name, value in (fields or {}).items():
+            self.segments.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            )
+        for name, (filename, fobj, mime) in files:
+            self.segments.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: {mime}\r\n\r\n'.encode("utf-8")
+            )
+            start = fobj.tell()
+            size = os.fstat(fobj.fileno()).st_size - start
+            self.segments.append((fobj, start, size))
+            self.segments.append(b"\r\n")
+        self.segments.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+        self.length = sum(len(s) if isinstance(s, bytes) else s[2] for s in self.segments)
+        self.seek(0)
+
+    def __len__(self):
+        return self.length
+
+    def seek(self, offset: int):
+        # Only rewinding is supported (used between retries)
+        self._index = 0
+        self._pending = b""
+        for segment in self.segments:
+            if not isinstance(segment, bytes):
+                segment[0].seek(segment[1])
+
+    def read(self, size: int = -1) -> bytes:
+        size = self.CHUNK if size is None or size < 0 else size
+        out = self._pending
+        while len(out) < size and self._index < len(self.segments):
+            segment = self.segments[self._index]
+            if isinstance(segment, bytes):
+                out += segment
+                self._index += 1
+            else:
+                data = segment[0].read(size - len(out))
+                if data:
+                    out += data
+                else:
+                    self._index += 1
+        self._pending = out[size:]
+        return out[:size]
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+def _rewind_files(kwargs: dict):
+    if hasattr(kwargs.get("data"), "seek"):
+        kwargs["data"].seek(0)
+    files = kwargs.get("files")
+    entries = files.values() if isinstance(files, dict) else (files or [])
+    for entry in entries:
+        field = entry[1] if isinstance(entry, tuple) and len(entry) == 2 else entry
+        fobj = field[1] if isinstance(field, tuple) and len(field) > 1 else field
+        if hasattr(fobj, "seek"):
+            fobj.seek(0)
+
+def _body_size(kwargs: dict) -> int:
+    data = kwargs.get("data") if kwargs.get("data") is not None else kwargs.get("json")
+    if data is None:
+        return 0
+    if isinstance(data, (bytes, str)):
+        return len(data)
+    if hasattr(data, "__len__") and not isinstance(data, (dict, list)):
+        return len(data)
+    return 0
+
+def _response_size(response: requests.Response, stream: bool) -> int:
+    if stream:
+        return int(response.headers.get("Content-Length") or 0)
+    return len(response.content)
+
+def _not_sent(e: Exception) -> bool:
+    """True when the request failed before reaching the server (connect error or timeout)."""
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+def request(method: str, url: str, retries: int = MAX_RETRIES, idempotent: bool = None, **kwargs) -> requests.Response:
+    """
+    Sends an HTTP request through the shared session with per-host rate limiting,
+    jittered exponential retries (honouring Retry-After) and a circuit breaker.
+    The last response is returned even if its status is an error, so callers can
+    keep checking status codes as before.
+
+    Non-idempotent methods (POST, PATCH) are only retried when the connection
+    could not be established, so a retry can't create a record or send an email
+    twice. Pass idempotent=True for calls that are safe to repeat.
+
+    Raises:
+        CircuitOpenError: If the host's breaker is open.
+        requests.RequestException: If every attempt failed at the network level.
+    """
+    host = _host(url)
+    policy = _policy(host)
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    for attempt in range(retries + 1):
+        if attempt:
+            policy.stats["retries"] += 1
+            _rewind_files(kwargs)
+        if not policy.breaker.allow():
+            policy.stats["rejected"] += 1
+            raise CircuitOpenError(f"Circuit open for {host}")
+        policy.bucket.acquire()
+        policy.stats["calls"] += 1
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            telemetry.record_http(host, type(e).__name__, time.perf_counter() - started, _body_size(kwargs))
+            policy.stats["failures"] += 1
+            policy.breaker.record_failure()
+            if attempt == retries or not (idempotent or _not_sent(e)):
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        received = _response_size(response, kwargs.get("stream", False))
+        telemetry.record_http(host, response.status_code, time.perf_counter() - started, _body_size(kwargs), received)
+
+        if response.status_code >= 500:
+            policy.stats["failures"] += 1
+            policy.breaker.record_failure()
+        else:
+            policy.breaker.record_success() # 429 means the host is up, just busy
+
+        if response.status_code not in RETRY_STATUSES or attempt == retries or not idempotent:
+            return response
+        delay = backoff_delay(attempt, retry_after_seconds(response.headers.get("Retry-After")))
+        print(f"   [HTTP] {host} returned {response.status_code}, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+        time.sleep(delay)
+
+def _is_retryable_error(e: Exception) -> bool:
+    status = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUSES
+    name = type(e).__name__
+    return any(marker in name for marker in ("RateLimit", "Timeout", "Connection", "InternalServer", "ServiceUnavailable"))
+
+def call_with_retry(host: str, fn, *args, retries: int = MAX_RETRIES, **kwargs):
+    """
+    Calls fn(*args, **kwargs) under `host`'s rate limit and breaker, retrying
+    retryable SDK errors (429/5xx, timeouts, connection errors) with backoff.
+    Used for clients that do their own HTTP, such as Groq via phi Agent.run.
+    """
+    for attempt in range(retries + 1):
+        try:
+            with guarded(host):
+                return fn(*args, **kwargs)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if attempt == retries or not _is_retryable_error(e):
+                raise
+            headers = getattr(getattr(e, "response", None), "headers", None) or {}
+            delay = backoff_delay(attempt, retry_after_seconds(headers.get("retry-after")))
+            _policy(host).stats["retries"] += 1
+            print(f"   [HTTP] {host} call failed ({type(e).__name__}), retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            time.sleep(delay)
+
+def get_stats() -> dict:
+    with _policies_lock:
+        return {host: {**p.stats, "breaker": p.breaker.state} for host, p in _policies.items()}
@@ -0,0 +1,197 @@
+import os
+import re
+import time
+import uuid
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+from ..db import db_path, connect
+
+JOB_INDEX_DB = db_path(os.getenv("JOB_INDEX_DB", "job_index.db"))
+
+# Two postings are near-duplicates when their title+company simhashes differ in at most this many bits.
+# The 64-bit hash is split into 4 indexed 16-bit bands, so any match within 3 bits shares a band.
+SIMHASH_MAX_DISTANCE = 3
+SIMHASH_BANDS = 4
+
+TRACKING_PARAMS = re.compile(
+    r'^(utm_.*|trk|trkInfo|trackingId|refId|ref|referrer|source|src|gclid|fbclid|mc_[a-z]+'
+    r'|position|pageNum|currentJobId|lipi|originalSubdomain|_ga|from|sid)$',
+    re.IGNORECASE
+)
+TITLE_NOISE = re.compile(r'\b(remote|hybrid|onsite|on-site|full[- ]time|part[- ]time|contract|urgent|hiring)\b')
+COMPANY_NOISE = re.compile(r'\b(inc|llc|ltd|limited|gmbh|corp|corporation|co|pvt|plc|sa|ag|bv|\(?[ws]\d{2}\)?)\b\.?')
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a job link: lowercase host without 'www.', no fragment,
+    no tracking parameters, sorted query and no trailing slash.
+    """
+    if not url:
+        return ""
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=False) if not TRACKING_PARAMS.match(k))
+    path = re.sub(r'/+$', '', parsed.path) or "/"
+    return urlunparse(("https", host, path, "", urlencode(query), ""))
+
+def _normalize_words(text: str, noise: re.Pattern = TITLE_NOISE) -> list:
+    text = noise.sub(" ", (text or "").lower())
+    return re.findall(r'[a-z0-9+#]+', text)
+
+def simhash(title: str, company: str) -> int:
+    """
+    64-bit simhash over title unigrams/bigrams and the company name.
+    Returns 0 when there is no company (title alone is too generic to fingerprint).
+    """
+    company_words = _normalize_words(company, COMPANY_NOISE)
+    title_words = _normalize_words(title)
+    if not company_words or not title_words:
+        return 0
+    features = title_words + [" ".join(pair) for pair in zip(title_words, title_words[1:])]
+    # Company weighs about half as much as the title, so the same title at another company lands far away
+    features += ["@" + " ".join(company_words)] * max(1, len(features) // 2)
+
+    weights = [0] * 64
+    for feature in features:
+        h = int.from_bytes(hashlib.md5(feature.encode("utf-8")).digest()[:8], "big")
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    value = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            value |= 1 << bit
+    return value
+
+def _bands(value: int) -> list:
+    width = 64 // SIMHASH_BANDS
+    return [(value >> (i * width)) & ((1 << width) - 1) for i in range(SIMHASH_BANDS)]
+
+def _to_sqlite(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def _from_sqlite(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class JobIndex:
+    """
+    Persistent index of every job seen by a hunt, used for cross-run deduplication.
+
+    Jobs are matched by normalized URL, then by a title+company simhash looked up
+    through banded indexes, so near-duplicates (tracking-parameter link variants,
+    the same posting on another board) resolve to one entry.
+    """
+
+    def __init__(self, path: str = JOB_INDEX_DB):
+        self._lock = threading.Lock()
+        self.conn = connect(path)
+        band_cols = ", ".join(f"band{i} INTEGER NOT NULL" for i in range(SIMHASH_BANDS))
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url_norm TEXT UNIQUE,
+                    simhash INTEGER NOT NULL,
+                    {band_cols},
+                    title TEXT,
+                    company TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    first_run TEXT NOT NULL,
+                    last_run TEXT NOT NULL
+                )"""
+            )
+            for i in range(SIMHASH_BANDS):
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_jobs_band{i} ON jobs (band{i}) WHERE simhash != 0")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS hunt_runs (run_id TEXT PRIMARY KEY, started_at REAL NOT NULL, finished_at REAL)"
+            )
+
+    def start_run(self) -> str:
+        run_id = uuid.uuid4().hex[:12]
+        with self._lock, self.conn:
+            self.conn.execute("INSERT INTO hunt_runs (run_id, started_at) VALUES (?, ?)", (run_id, time.time()))
+        return run_id
+
+    def finish_run(self, run_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE hunt_runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def _find_locked(self, url_norm: str, value: int):
+        if url_norm:
+            row = self.conn.execute("SELECT id, first_run FROM jobs WHERE url_norm = ?", (url_norm,)).fetchone()
+            if row:
+                return row
+        if not value:
+            return None
+        clauses = " OR ".join(f"band{i} = ?" for i in range(SIMHASH_BANDS))
+        candidates = self.conn.execute(
+            f"SELECT id, first_run, simhash FROM jobs WHERE simhash != 0 AND ({clauses})", _bands(value)
+        ).fetchall()
+        for job_id, first_run, other in candidates:
+            if bin(value ^ _from_sqlite(other)).count("1") <= SIMHASH_MAX_DISTANCE:
+                return job_id, first_run
+        return None
+
+    def record(self, jobs: list, run_id: str):
+        """
+        Deduplicates a batch of jobs and records them in the index under run_id.
+        May be called several times per run (e.g. once per profile); 'new' always
+        means first seen by this run.
+
+        Returns:
+            tuple: (unique_jobs, new_jobs). unique_jobs has one entry per posting
+            in the batch; new_jobs is the subset never seen by an earlier run.
+        """
+        unique = []
+        new = []
+        seen_ids = set()
+        now = time.time()
+        with self._lock, self.conn:
+            for job in jobs:
+                if not isinstance(job, dict) or not job.get('link'):
+                    continue
+                url_norm = normalize_url(job['link'])
+                value = simhash(job.get('title', ''), job.get('company', ''))
+                match = self._find_locked(url_norm, value)
+                if match:
+                    job_id, first_run = match
+                    if job_id in seen_ids:
+                        continue  # Duplicate of a job earlier in this batch
+                    seen_ids.add(job_id)
+                    self.conn.execute("UPDATE jobs SET last_seen = ?, last_run = ? WHERE id = ?", (now, run_id, job_id))
+                    unique.append(job)
+                    if first_run == run_id:
+                        new.append(job)
+                    continue
+                cursor = self.conn.execute(
+                    f"""INSERT INTO jobs (url_norm, simhash, {", ".join(f"band{i}" for i in range(SIMHASH_BANDS))},
+                        title, company, first_seen, last_seen, first_run, last_run)
+                        VALUES (?, ?, {", ".join("?" * SIMHASH_BANDS)}, ?, ?, ?, ?, ?, ?)""",
+                    (url_norm, _to_sqlite(value), *_bands(value), job.get('title'), job.get('company'), now, now, run_id, run_id),
+                )
+                seen_ids.add(cursor.lastrowid)
+                unique.append(job)
+                new.append(job)
+        return unique, new
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+_job_index = None
+_job_index_lock = threading.Lock()
+
+def get_job_index() -> JobIndex:
+    """The shared JobIndex, built on first use rather than at import (it opens job_index.db)."""
+    global _job_index
+    with _job_index_lock:
+        if _job_index is None:
+            _job_index = JobIndex()
+        return _job_index
@@ -0,0 +1,128 @@
+import os
+import json
+from . import http_client
+
+PB_URL = os.getenv("POCKETBASE_URL", "http://127.0.0.1:8090")
+PB_PAGE_SIZE = int(os.getenv("POCKETBASE_PAGE_SIZE", "200"))
+
+# PocketBase bookkeeping fields that carry no information for the LLM or reports
+SYSTEM_FIELDS = ("collectionId", "collectionName", "expand")
+
+
+class PocketBaseError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"PocketBase returned {status_code}: {message}")
+        self.status_code = status_code
+
+
+def records_url(collection: str) -> str:
+    return f"{PB_URL}/api/collections/{collection}/records"
+
+def file_url(collection: str, record_id: str, filename: str) -> str:
+    return f"{PB_URL}/api/files/{collection}/{record_id}/{filename}"
+
+def _check(response):
+    if response.status_code >= 300:
+        raise PocketBaseError(response.status_code, response.text[:300])
+    return response
+
+def strip_system_fields(record: dict) -> dict:
+    return {k: v for k, v in record.items() if k not in SYSTEM_FIELDS}
+
+def iter_records(collection: str, filter_str: str = None, fields: str = None, sort: str = None,
+                 per_page: int = PB_PAGE_SIZE, limit: int = None):
+    """
+    Streams records page by page over the pooled session.
+    Uses skipTotal so PocketBase doesn't run a COUNT query per page, and `fields`
+    to project only the columns the caller needs.
+
+    Args:
+        collection (str): Collection name.
+        filter_str (str): PocketBase filter expression.
+        fields (str): Comma separated projection (e.g. 'id,title,updated').
+        sort (str): Sort expression (e.g. '-created').
+        limit (int): Stop after this many records.
+    """
+    params = {"perPage": per_page if not limit else min(per_page, limit), "skipTotal": 1}
+    if filter_str:
+        params["filter"] = filter_str
+    if fields:
+        params["fields"] = fields
+    if sort:
+        params["sort"] = sort
+
+    page = 1
+    yielded = 0
+    while True:
+        params["page"] = page
+        data = _check(http_client.request("GET", records_url(collection), params=params, timeout=15)).json()
+        items = data.get("items", [])
+        for item in items:
+            yield item
+            yielded += 1
+            if limit and yielded >= limit:
+                return
+        if len(items) < params["perPage"]:
+            return
+        page += 1
+
+def list_records(collection: str, **kwargs) -> list:
+    return list(iter_records(collection, **kwargs))
+
+def get_record(collection: str, record_id: str, fields: str = None) -> dict:
+    params = {"fields": fields} if fields else None
+    return _check(http_client.request("GET", f"{records_url(collection)}/{record_id}", params=params, timeout=15)).json()
+
+def create_record(collection: str, data: dict, files: list = None) -> dict:
+    """
+    Creates a record and returns it. Files are streamed from disk as multipart.
+
+    Raises:
+        PocketBaseError: On a non-2xx response.
+    """
+    if not files:
+        return _check(http_client.request("POST", records_url(collection), json=data, timeout=60)).json()
+    body = http_client.MultipartStream(data, files)
+    return _check(http_client.request("POST", records_url(collection), data=body,
+                                      headers={"Content-Type": body.content_type}, timeout=60)).json()
+
+def delete_record(collection: str, record_id: str):
+    _check(http_client.request("DELETE", f"{records_url(collection)}/{record_id}", timeout=15))
+
+def get_file(collection: str, record_id: str, filename: str, stream: bool = False):
+    return _check(http_client.request("GET", file_url(collection, record_id, filename), stream=stream, timeout=30))
+
+def open_realtime(read_timeout: float = 360):
+    """
+    Opens the realtime SSE stream. The first event is PB_CONNECT carrying the clientId
+    that set_subscriptions needs. PocketBase drops idle clients after ~5 minutes,
+    so callers should reconnect when the stream ends.
+    """
+    return _check(http_client.request("GET", f"{PB_URL}/api/realtime", retries=0, stream=True,
+                                      headers={"Accept": "text/event-stream"}, timeout=(10, read_timeout)))
+
+def set_subscriptions(client_id: str, topics: list):
+    # Replaces the client's subscription set, so repeating it is harmless
+    _check(http_client.request("POST", f"{PB_URL}/api/realtime", idempotent=True,
+                               json={"clientId": client_id, "subscriptions": topics}, timeout=15))
+
+def iter_sse(response):
+    """
+    Parses a text/event-stream response into (event, data) tuples.
+    """
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+def to_compact_json(records) -> str:
+    """Minified JSON for tool output: no indentation and no spaces after separators."""
+    return json.dumps(records, separators=(",", ":"), ensure_ascii=False, default=str)
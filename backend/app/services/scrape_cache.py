@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+CACHE_DIR = os.getenv(
+    "SCRAPE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.cache', 'scrape')
+)
+
+# Default freshness window (seconds) and per-source overrides, matched by host suffix.
+DEFAULT_TTL = int(os.getenv("SCRAPE_CACHE_TTL", str(6 * 3600)))
+SOURCE_TTLS = {
+    "linkedin.com": 2 * 3600,      # Fast moving, guest search results churn quickly
+    "naukri.com": 3 * 3600,
+    "remoteok.com": 4 * 3600,
+    "ycombinator.com": 12 * 3600,  # Curated boards change slowly
+    "himalayas.app": 12 * 3600,
+}
+
+# How long past its TTL an entry may still be served while it is refreshed in the background.
+STALE_WHILE_REVALIDATE = int(os.getenv("SCRAPE_CACHE_SWR", str(24 * 3600)))
+MAX_BYTES = int(os.getenv("SCRAPE_CACHE_MAX_MB", "50")) * 1024 * 1024
+
+
+class ScrapeCache:
+    """
+    On-disk cache for scraped pages, keyed by a hash of the target URL.
+
+    Entries are JSON files ({url, fetched_at, body}) under CACHE_DIR. Total size is
+    bounded by LRU eviction, and expired entries can be served stale while a
+    background refresh runs. Concurrent lookups for the same URL share one fetch.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES,
+                 default_ttl: int = DEFAULT_TTL, source_ttls: dict = None,
+                 stale_while_revalidate: int = STALE_WHILE_REVALIDATE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.source_ttls = SOURCE_TTLS if source_ttls is None else source_ttls
+        self.stale_while_revalidate = stale_while_revalidate
+
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self._inflight = {}          # key -> Future shared by concurrent callers
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "evictions": 0, "errors": 0}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    # --- Internals ---
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, name[:-5], st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def ttl_for(self, url: str) -> int:
+        host = (urlparse(url).hostname or "").lower()
+        for suffix, ttl in self.source_ttls.items():
+            if host == suffix or host.endswith("." + suffix):
+                return ttl
+        return self.default_ttl
+
+    def _read(self, key: str):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, url: str, body: str):
+        data = json.dumps({"url": url, "fetched_at": time.time(), "body": body}, separators=(",", ":"))
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        size = len(data.encode("utf-8"))
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = size
+            self._total_bytes += size
+            self._evict_locked()
+
+    def _evict_locked(self):
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _count(self, stat: str):
+        # Lookups run concurrently from the hunt's thread pool
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _touch(self, key: str):
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _fetch_shared(self, key: str, url: str, fetcher) -> str:
+        """Runs fetcher once per key; concurrent callers wait on the same result."""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            body = fetcher(url)
+            if body is not None and not body.startswith("Error"):
+                self._write(key, url, body)
+            else:
+                self._count("errors")
+            future.set_result(body)
+            return body
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key: str, url: str, fetcher):
+        with self._lock:
+            if key in self._inflight:
+                return
+            self.stats["refreshes"] += 1
+
+        def _refresh():
+            try:
+                self._fetch_shared(key, url, fetcher)
+            except Exception as e:
+                print(f"   [ScrapeCache] Background refresh failed for {url}: {e}")
+
+        threading.Thread(target=_refresh, name="scrape-cache-refresh", daemon=True).start()
+
+    # --- Public API ---
+
+    def get_or_fetch(self, url: str, fetcher) -> str:
+        """
+        Returns the cached body for url, calling fetcher(url) on a miss.
+        Error responses (strings starting with 'Error') are returned but never cached.
+        """
+        key = self._key(url)
+        entry = self._read(key) if key in self._index else None
+
+        if entry is not None:
+            age = time.time() - entry.get("fetched_at", 0)
+            ttl = self.ttl_for(url)
+            if age <= ttl:
+                self._count("hits")
+                self._touch(key)
+                return entry["body"]
+            if age <= ttl + self.stale_while_revalidate:
+                self._count("stale_hits")
+                self._touch(key)
+                self._refresh_in_background(key, url, fetcher)
+                return entry["body"]
+
+        self._count("misses")
+        return self._fetch_shared(key, url, fetcher)
+
+    def invalidate(self, url: str):
+        key = self._key(url)
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round((self.stats["hits"] + self.stats["stale_hits"]) / lookups, 3) if lookups else 0.0,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_scrape_cache = None
+_scrape_cache_lock = threading.Lock()
+
+def get_scrape_cache() -> ScrapeCache:
+    """The shared ScrapeCache, built on first use rather than at import (it opens the cache directory)."""
+    global _scrape_cache
+    with _scrape_cache_lock:
+        if _scrape_cache is None:
+            _scrape_cache = ScrapeCache()
+        return _scrape_cache
@@ -0,0 +1,308 @@
+"""
+Deterministic parsers for the job boards in run_job_hunt's target list.
+
+Each parser reads the Jina Markdown of one search page and returns job dicts with
+'title', 'company', 'location', 'link', 'summary' and 'source'. Parsers are
+registered per host; the LLM parser is only used when no parser matches a URL or
+the matching parser finds nothing.
+"""
+import re
+from urllib.parse import urlparse, urljoin
+from .schemas import validate_jobs
+
+# host suffix -> (source name, parser function)
+_REGISTRY = {}
+
+MARKDOWN_LINK = re.compile(r'(?<!!)\[([^\[\]]*(?:\[[^\]]*\][^\[\]]*)*)\]\((https?://[^\s)]+|/[^\s)]*)(?:\s+"[^"]*")?\)')
+MARKDOWN_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+LOCATION_HINT = re.compile(
+    r'\b(Remote(?:\s*\([^)]*\))?|Worldwide|Anywhere|Hybrid|On-?site'
+    r'|[A-Z][a-zA-Z .]+,\s*(?:[A-Z]{2}|[A-Z][a-zA-Z ]+))(?!\w)'
+)
+# Separators between the short facts on a listing line (company · type · location)
+FACT_SEPARATOR = re.compile(r'\s*[·•|]\s*')
+GENERIC_LINK_TEXT = {"apply", "apply now", "view job", "view", "details", "save", "more", "read more", "see more"}
+MAX_SUMMARY_WORDS = 20
+
+
+def register_parser(*hosts, source: str):
+    """
+    Decorator registering a parser for one or more host suffixes.
+    The parser is called as fn(markdown, base_url) and returns a list of job dicts.
+    """
+    def decorator(fn):
+        for host in hosts:
+            _REGISTRY[host.lower()] = (source, fn)
+        return fn
+    return decorator
+
+def get_parser(url: str):
+    """
+    Returns (source, parser) for the URL's host, or None when no parser is registered.
+    """
+    host = (urlparse(url).hostname or "").lower()
+    for suffix, entry in _REGISTRY.items():
+        if host == suffix or host.endswith("." + suffix):
+            return entry
+    return None
+
+def parse_listing_page(url: str, markdown: str) -> list:
+    """
+    Parses a scraped search page with its registered parser.
+
+    Returns:
+        list: Parsed jobs. Empty when no parser is registered or nothing matched,
+        which tells the caller to fall back to the LLM.
+    """
+    entry = get_parser(url)
+    if not entry:
+        return []
+    source, parser = entry
+    try:
+        jobs = parse_markdown_table(markdown, url, source) or parser(markdown, url)
+    except Exception as e:
+        print(f"    [Parser] {source} parser failed: {e}")
+        return []
+    for job in jobs:
+        job.setdefault("source", source)
+    # Same schema check as LLM output, so a parser regression can't slip bad jobs through
+    jobs, rejected = validate_jobs(jobs, url)
+    if rejected:
+        print(f"    [Parser] {source}: dropped {rejected} jobs that failed validation.")
+    return jobs
+
+
+# --- Shared helpers ---
+
+def _clean_text(text: str) -> str:
+    text = MARKDOWN_IMAGE.sub("", text)
+    text = MARKDOWN_LINK.sub(lambda m: m.group(1), text)
+    text = re.sub(r'[*_`#>|]+', ' ', text)
+    text = text.replace("\\", "")
+    return re.sub(r'\s+', ' ', text).strip(" -•·:")
+
+def _summarize(text: str) -> str:
+    words = _clean_text(text).split()
+    return " ".join(words[:MAX_SUMMARY_WORDS])
+
+def _slug_to_name(slug: str) -> str:
+    slug = re.sub(r'^\d+-', '', slug)
+    return " ".join(part.capitalize() for part in slug.replace("_", "-").split("-") if part)
+
+def _find_location(lines: list, default: str = "") -> str:
+    """
+    Looks for a location among the short facts of a listing's lines, one line and
+    one '·'/'|' separated fact at a time, so a match never runs into the next line.
+    Prose (a description) is skipped.
+    """
+    for line in lines:
+        for fact in FACT_SEPARATOR.split(MARKDOWN_LINK.sub(lambda m: m.group(1), line)):
+            fact = _clean_text(fact)
+            if len(fact.split()) >= 8:
+                continue
+            match = LOCATION_HINT.search(fact)
+            if match:
+                return match.group(1).strip()
+    return default
+
+def _extract_link_jobs(markdown: str, base_url: str, job_path: re.Pattern, source: str,
+                       company_path: re.Pattern = None, company_from_url=None,
+                       default_location: str = "") -> list:
+    """
+    Generic listing extractor: every Markdown link whose path matches job_path is a job.
+    Text between one job link and the next forms that job's block, which is searched
+    for the company link, a location and a one-line summary.
+    """
+    lines = markdown.splitlines()
+    anchors = []  # (line index, title, absolute link)
+    for i, line in enumerate(lines):
+        for m in MARKDOWN_LINK.finditer(line):
+            link = urljoin(base_url, m.group(2))
+            if job_path.search(urlparse(link).path):
+                anchors.append((i, _clean_text(m.group(1)), link))
+
+    jobs = {}
+    for n, (i, title, link) in enumerate(anchors):
+        if link in jobs:
+            if not jobs[link]["title"] and title:
+                jobs[link]["title"] = title
+            continue
+        end = anchors[n + 1][0] if n + 1 < len(anchors) else min(len(lines), i + 8)
+        block = lines[i:max(end, i + 1)]
+        block_text = "\n".join(block)
+
+        if not title or title.lower() in GENERIC_LINK_TEXT:
+            headings = [_clean_text(l) for l in block if l.lstrip().startswith("#")]
+            title = headings[0] if headings else title
+
+        company = ""
+        if company_path is not None:
+            for m in MARKDOWN_LINK.finditer(block_text):
+                if company_path.search(urlparse(urljoin(base_url, m.group(2))).path):
+                    company = _clean_text(m.group(1))
+                    if company:
+                        break
+        if not company and company_from_url is not None:
+            company = company_from_url(link) or ""
+
+        # First prose-like line (skips short location / job-type lines)
+        summary_lines = [
+            l for l in block
+            if len(_clean_text(l).split()) >= 8 and not MARKDOWN_LINK.search(l) and not l.lstrip().startswith("#")
+        ]
+        jobs[link] = {
+            "title": title,
+            "company": company,
+            "location": _find_location(block[1:], default_location), # block[0] is the title link
+            "link": link,
+            "summary": _summarize(summary_lines[0]) if summary_lines else "",
+            "source": source,
+        }
+    return [job for job in jobs.values() if job["title"]]
+
+def parse_markdown_table(markdown: str, base_url: str, source: str) -> list:
+    """
+    Parses Markdown tables whose header names a title/role column (RemoteOK and
+    several boards render listings this way through Jina).
+    """
+    jobs = []
+    header = None
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        if not (stripped.startswith("|") and stripped.endswith("|")):
+            header = None
+            continue
+        cells = [c.strip() for c in stripped.strip("|").split("|")]
+        if all(re.fullmatch(r':?-{2,}:?', c) for c in cells if c):
+            continue
+        if header is None:
+            names = [_clean_text(c).lower() for c in cells]
+            title_col = next((k for k, c in enumerate(names) if c in ("title", "position", "role", "job", "job title")), None)
+            if title_col is None:
+                header = None
+                continue
+            header = {
+                "title": title_col,
+                "company": next((k for k, c in enumerate(names) if c in ("company", "employer")), None),
+                "location": next((k for k, c in enumerate(names) if c in ("location", "region")), None),
+            }
+            continue
+
+        def cell(col):
+            return cells[col] if col is not None and col < len(cells) else ""
+
+        link_match = MARKDOWN_LINK.search(cell(header["title"])) or MARKDOWN_LINK.search(stripped)
+        title = _clean_text(cell(header["title"]))
+        if not (title and link_match):
+            continue
+        jobs.append({
+            "title": title,
+            "company": _clean_text(cell(header["company"])),
+            "location": _clean_text(cell(header["location"])),
+            "link": urljoin(base_url, link_match.group(2)),
+            "summary": "",
+            "source": source,
+        })
+    return jobs
+
+
+# --- Per-source parsers ---
+
+def _path_segment(link: str, index: int) -> str:
+    parts = [p for p in urlparse(link).path.split("/") if p]
+    return parts[index] if len(parts) > index else ""
+
+@register_parser("ycombinator.com", source="YC")
+def parse_yc(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/companies/[^/]+/jobs/[^/]+'),
+        source="YC",
+        company_path=re.compile(r'^/companies/[^/]+/?$'),
+        company_from_url=lambda link: _slug_to_name(_path_segment(link, 1)),
+    )
+
+@register_parser("remoteok.com", "remoteok.io", source="RemoteOK")
+def parse_remoteok(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/remote-jobs/(?:remote-)?[^/]*\d+$'),
+        source="RemoteOK",
+        company_path=re.compile(r'^/remote-companies/|^/company/'),
+        default_location="Remote",
+    )
+
+@register_parser("weworkremotely.com", source="WeWorkRemotely")
+def parse_weworkremotely(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/remote-jobs/(?!search|new)[a-z0-9-]+$'),
+        source="WeWorkRemotely",
+        company_path=re.compile(r'^/company/'),
+        default_location="Remote",
+    )
+
+@register_parser("himalayas.app", source="Himalayas")
+def parse_himalayas(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/companies/[^/]+/jobs/[^/]+'),
+        source="Himalayas",
+        company_path=re.compile(r'^/companies/[^/]+/?$'),
+        company_from_url=lambda link: _slug_to_name(_path_segment(link, 1)),
+        default_location="Remote",
+    )
+
+@register_parser("linkedin.com", source="LinkedIn")
+def parse_linkedin(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/jobs/view/[^/]+'),
+        source="LinkedIn",
+        company_path=re.compile(r'^/company/'),
+    )
+
+@register_parser("wellfound.com", "angel.co", source="Wellfound")
+def parse_wellfound(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/jobs/\d+-[^/]+'),
+        source="Wellfound",
+        company_path=re.compile(r'^/company/[^/]+/?$'),
+    )
+
+@register_parser("workingnomads.com", source="WorkingNomads")
+def parse_workingnomads(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/jobs?/(?!\?)[a-z0-9-]{8,}$'),
+        source="WorkingNomads",
+        default_location="Remote",
+    )
+
+@register_parser("arc.dev", source="Arc.dev")
+def parse_arc(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/remote-jobs/details/[^/]+'),
+        source="Arc.dev",
+        company_path=re.compile(r'^/company/'),
+        default_location="Remote",
+    )
+
+@register_parser("flexjobs.com", source="FlexJobs")
+def parse_flexjobs(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/(?:publicjobs|remote-jobs/details)/[^/]+'),
+        source="FlexJobs",
+    )
+
+@register_parser("naukri.com", source="Naukri")
+def parse_naukri(markdown: str, base_url: str) -> list:
+    return _extract_link_jobs(
+        markdown, base_url,
+        job_path=re.compile(r'^/job-listings-[^/]+'),
+        source="Naukri",
+        company_path=re.compile(r'-jobs-careers-\d+'),
+    )
@@ -0,0 +1,85 @@
+import os
+import time
+import json
+import threading
+import importlib
+
+# Load the heavy subsystems (phi/Groq, chat agent, PDF stack) in the background once the server is up
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
+def _process_age() -> float:
+    """Seconds since this process was started (Linux), or 0 when unknown."""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return 0.0
+
+_imported_at = time.perf_counter()
+_process_started = _imported_at - _process_age()
+_lock = threading.Lock()
+_report = {"interpreter_s": round(_imported_at - _process_started, 3), "imports_s": None, "ready_s": None,
+           "warmup": {}, "warm": False}
+
+
+def lazy(module: str, attr: str):
+    """
+    Returns a stand-in for `module.attr` (module relative to the app package) that
+    imports it on first call, keeping the module's dependencies off the startup path.
+    """
+    target = None
+
+    def call(*args, **kwargs):
+        nonlocal target
+        if target is None:
+            target = getattr(importlib.import_module(module, __package__), attr)
+        return target(*args, **kwargs)
+
+    call.__name__ = attr
+    return call
+
+def preload(module: str):
+    """Returns a warm-up step that imports `module` (relative to the app package)."""
+    return lambda: importlib.import_module(module, __package__)
+
+def mark_imported():
+    """Call at the end of app.main's imports."""
+    with _lock:
+        _report["imports_s"] = round(time.perf_counter() - _imported_at, 3)
+
+def mark_ready():
+    """Call when the startup event has finished and requests are being served."""
+    with _lock:
+        _report["ready_s"] = round(time.perf_counter() - _process_started, 3)
+    print(f"🚀 JobOs: ready {_report['ready_s']}s after process start (app imports {_report['imports_s']}s)")
+
+def warm_up(steps: list):
+    """
+    Runs [(name, fn)] one after another on a daemon thread and records how long each
+    took. Requests that need a step before it ran simply do the work themselves.
+    """
+    def run():
+        for name, fn in steps:
+            started = time.perf_counter()
+            try:
+                fn()
+                status = "ok"
+            except Exception as e:
+                status = f"error: {e}"
+                print(f"⚠️ Warm-up step '{name}' failed: {e}")
+            with _lock:
+                _report["warmup"][name] = {"seconds": round(time.perf_counter() - started, 3), "status": status}
+        with _lock:
+            _report["warm"] = True
+            total = round(time.perf_counter() - _process_started, 3)
+            _report["warm_s"] = total
+        print(f"🔥 JobOs: warm-up finished {total}s after process start {json.dumps(_report['warmup'])}")
+
+    if not STARTUP_WARMUP:
+        return
+    threading.Thread(target=run, name="startup-warmup", daemon=True).start()
+
+def report() -> dict:
+    with _lock:
+        return {**_report, "warmup": dict(_report["warmup"]), "uptime_s": round(time.perf_counter() - _process_started, 1)}
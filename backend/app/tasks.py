@@ -0,0 +1,128 @@
+import os
+import time
+import uuid
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "2"))
+TASK_MAX_PENDING = int(os.getenv("TASK_MAX_PENDING", "20"))
+TASK_HISTORY = int(os.getenv("TASK_HISTORY", "200"))
+
+
+class TaskQueueFull(Exception):
+    pass
+
+
+class Task:
+    """
+    One background job (hunt, resume...). Progress is an append-only list of events
+    that status pollers and SSE streams read by index.
+    """
+
+    def __init__(self, kind: str, params: dict = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.events = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **data):
+        with self._lock:
+            self.events.append({"seq": len(self.events), "event": event, "time": time.time(), "data": data})
+
+    def finish(self, status: str, result=None, error: str = None):
+        """
+        Records the outcome. The terminal event is appended before `done` turns
+        True, so a stream that stops on done has always seen it.
+        """
+        with self._lock:
+            self.finished_at = time.time()
+            self.result = result
+            self.error = error
+            self.events.append({"seq": len(self.events), "event": status, "time": self.finished_at,
+                                "data": {"error": error, "elapsed_s": round(self.finished_at - self.started_at, 3)}})
+            self.status = status
+
+    def events_since(self, seq: int) -> list:
+        with self._lock:
+            return self.events[seq:]
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def summary(self) -> dict:
+        return {
+            "task_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "last_event": self.events[-1] if self.events else None,
+        }
+
+
+class TaskManager:
+    """
+    Runs blocking work (scraping, LLM calls, PDF rendering) on a bounded worker pool
+    so request handlers can return a task id immediately.
+    """
+
+    def __init__(self, workers: int = TASK_WORKERS, max_pending: int = TASK_MAX_PENDING, history: int = TASK_HISTORY):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="task")
+        self.max_pending = max_pending
+        self.history = history
+        self.tasks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn, *args, params: dict = None, **kwargs) -> Task:
+        """
+        Queues fn(*args, progress=task.emit, **kwargs) and returns its Task.
+
+        Raises:
+            TaskQueueFull: When TASK_MAX_PENDING tasks are already queued or running.
+        """
+        task = Task(kind, params)
+        with self._lock:
+            pending = sum(1 for t in self.tasks.values() if not t.done)
+            if pending >= self.max_pending:
+                raise TaskQueueFull(f"{pending} tasks already pending")
+            self.tasks[task.id] = task
+            self._prune_locked()
+        task.emit("queued")
+        self.pool.submit(self._run, task, fn, args, kwargs)
+        return task
+
+    def _run(self, task: Task, fn, args, kwargs):
+        task.status = "running"
+        task.started_at = time.time()
+        task.emit("started")
+        try:
+            result = fn(*args, progress=task.emit, **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            task.finish("failed", error=str(e))
+            return
+        task.finish("succeeded", result=result)
+
+    def _prune_locked(self):
+        finished = [tid for tid, t in self.tasks.items() if t.done]
+        while len(self.tasks) > self.history and finished:
+            self.tasks.pop(finished.pop(0), None)
+
+    def get(self, task_id: str):
+        with self._lock:
+            return self.tasks.get(task_id)
+
+
+task_manager = TaskManager()
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+# Structured per-run timing log line (one JSON object per hunt/resume/chat run)
+TRACE_LOG = os.getenv("TRACE_LOG", "true").lower() == "true"
+
+# Summaries of the most recent runs, newest last (read by the benchmark harness)
+RECENT_RUNS = int(os.getenv("TRACE_RECENT_RUNS", "50"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_str(labelnames: tuple, values: tuple) -> str:
+    if not labelnames:
+        return ""
+    pairs = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_str(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.series = {} # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self.series.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for key, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_label_str(names, key + (bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_label_str(names, key + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {round(series[-2], 6)}")
+                lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name: str, help_text: str, labelnames: tuple = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+stage_seconds = registry.histogram("jobos_stage_seconds", "Latency of pipeline stages", ("stage",))
+stage_errors = registry.counter("jobos_stage_errors_total", "Pipeline stages that raised", ("stage",))
+run_seconds = registry.histogram("jobos_run_seconds", "End-to-end latency of hunts, resumes and chats", ("kind", "status"))
+llm_tokens = registry.counter("jobos_llm_tokens_total", "Estimated LLM tokens", ("stage", "direction"))
+http_seconds = registry.histogram("jobos_http_request_seconds", "Outbound call latency per attempt", ("host",))
+http_requests = registry.counter("jobos_http_requests_total", "Outbound calls per attempt", ("host", "status"))
+http_bytes = registry.counter("jobos_http_bytes_total", "Outbound bytes transferred", ("host", "direction"))
+router_calls = registry.counter("jobos_router_calls_total", "Model router calls per tier and outcome", ("router", "tier", "outcome"))
+router_seconds = registry.histogram("jobos_router_seconds", "Model call latency per router tier", ("router", "tier"))
+structured_output = registry.counter("jobos_structured_output_total", "Parsed model outputs by kind and outcome (clean, repaired, completed, failed)", ("kind", "outcome"))
+
+
+class RunTrace:
+    """Spans and token totals collected for one run, logged as a single JSON line."""
+
+    def __init__(self, kind: str, attrs: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.spans = []
+        self.tokens = {"prompt": 0, "completion": 0}
+        self._lock = threading.Lock()
+
+    def add_span(self, span: dict):
+        with self._lock:
+            self.spans.append(span)
+
+    def add_tokens(self, prompt: int, completion: int):
+        with self._lock:
+            self.tokens["prompt"] += prompt
+            self.tokens["completion"] += completion
+
+    def summary(self, status: str) -> dict:
+        with self._lock:
+            by_stage = {}
+            for s in self.spans:
+                totals = by_stage.setdefault(s["stage"], {"count": 0, "total_s": 0.0, "max_s": 0.0, "errors": 0})
+                totals["count"] += 1
+                totals["total_s"] = round(totals["total_s"] + s["seconds"], 4)
+                totals["max_s"] = max(totals["max_s"], s["seconds"])
+                totals["errors"] += int(s["error"] is not None)
+            return {
+                "run_id": self.id,
+                "kind": self.kind,
+                "status": status,
+                "seconds": round(time.perf_counter() - self.started, 4),
+                "tokens": dict(self.tokens),
+                "stages": by_stage,
+                **self.attrs,
+            }
+
+
+_current_run = contextvars.ContextVar("jobos_run", default=None)
+recent_runs = deque(maxlen=RECENT_RUNS)
+
+def current_run():
+    return _current_run.get()
+
+@contextmanager
+def trace_run(kind: str, **attrs):
+    """
+    Groups the spans recorded inside it (including in threads started with bind())
+    into one run and logs its per-stage timings when it ends.
+    """
+    run = RunTrace(kind, attrs)
+    token = _current_run.set(run)
+    status = "ok"
+    try:
+        yield run
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _current_run.reset(token)
+        summary = run.summary(status)
+        run_seconds.observe(summary["seconds"], kind=kind, status=status)
+        recent_runs.append(summary)
+        if TRACE_LOG:
+            print(f"📈 [Trace] {json.dumps(summary, default=str)}")
+
+@contextmanager
+def span(stage: str, **attrs):
+    """
+    Times one stage. Latency goes to jobos_stage_seconds; exceptions are counted
+    and re-raised.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        seconds = round(time.perf_counter() - started, 4)
+        stage_seconds.observe(seconds, stage=stage)
+        run = _current_run.get()
+        if run is not None:
+            run.add_span({"stage": stage, "seconds": seconds, "error": error, **attrs})
+
+def bind(fn):
+    """
+    Wraps fn so it runs in a copy of the caller's context (ThreadPoolExecutor
+    workers don't inherit contextvars). Call once per submission.
+    """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+def bind_stream(iterator):
+    """
+    Advances a generator in one fixed context. StreamingResponse runs each step
+    of a sync generator in a worker thread with a fresh copy of the request
+    context, which would split a trace_run() inside it across contexts.
+    """
+    ctx = contextvars.copy_context()
+    while True:
+        try:
+            yield ctx.run(next, iterator)
+        except StopIteration:
+            return
+
+def record_tokens(stage: str, prompt: int, completion: int):
+    llm_tokens.inc(prompt, stage=stage, direction="prompt")
+    llm_tokens.inc(completion, stage=stage, direction="completion")
+    run = _current_run.get()
+    if run is not None:
+        run.add_tokens(prompt, completion)
+
+def record_http(host: str, status, seconds: float, sent: int = 0, received: int = 0):
+    http_seconds.observe(seconds, host=host)
+    http_requests.inc(host=host, status=status)
+    if sent:
+        http_bytes.inc(sent, host=host, direction="sent")
+    if received:
+        http_bytes.inc(received, host=host, direction="received")
+
+def render_metrics() -> str:
+    return registry.render()
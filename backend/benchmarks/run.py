@@ -0,0 +1,397 @@
+"""
+Offline end-to-end benchmark for the hunt and resume pipelines.
+
+Runs the real run_job_hunt / run_profile_hunts / build_resume / generate_job_report
+code against the local stand-ins in benchmarks/stubs.py, with every cache, index
+and report directory in a throw-away folder, and writes one JSON file per run.
+
+Usage (from backend/):
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --out new.json --compare bench.json   # exits 1 on regression
+"""
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+from .stubs import StubServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("hunt_cold", "hunt_warm", "profile_hunts", "resume", "report_render", "chat")
+ROLES = ("Generative AI", "Machine Learning Engineer", "Data Scientist", "Backend Engineer", "LLM Engineer",
+         "MLOps Engineer", "Platform Engineer", "AI Research Engineer", "Full Stack Developer", "NLP Engineer")
+JOB_DESCRIPTION = (
+    "We are hiring a Generative AI Engineer to build retrieval-augmented LLM features. "
+    "You will design evaluation pipelines, ship FastAPI services on Kubernetes and work with "
+    "PyTorch, LangChain and vector databases. 2+ years of Python experience required."
+)
+# Metrics compared by --compare (lower is better)
+COMPARED = ("seconds", "p50_s", "p95_s", "peak_rss_mb", "late_first_token_s", "late_prompt_tokens")
+CHAT_QUESTIONS = (
+    "Which of my projects use FastAPI?", "List my certifications from 2024.", "Which recruiters work in Bangalore?",
+    "Summarise my latest resume.", "What skills appear most across my projects?", "Any placement agencies for ML roles?",
+)
+
+
+def configure_env(stub: StubServer, workdir: str, args):
+    """Points every outbound URL at the stand-ins and every local store at workdir."""
+    os.environ.update({
+        "JINA_READER_URL": stub.url,
+        "GROQ_BASE_URL": stub.url,
+        "POCKETBASE_URL": stub.url,
+        "BREVO_API_URL": f"{stub.url}/v3/smtp/email",
+        "GROQ_API_KEY": "bench",
+        "BREVO_API_KEY": "bench",
+        "JINA_API_KEY": "",
+        "EMAIL_RECEIVER": "bench@example.com",
+        "EXTRACTION_CACHE_DB": os.path.join(workdir, "hunt_cache.db"),
+        "JOB_INDEX_DB": os.path.join(workdir, "job_index.db"),
+        "SCHEDULER_DB": os.path.join(workdir, "scheduler.db"),
+        "ARTIFACT_DB": os.path.join(workdir, "artifacts.db"),
+        "FILE_TEXT_CACHE_DB": os.path.join(workdir, "file_text_cache.db"),
+        "EMAIL_DIGEST_DB": os.path.join(workdir, "email_digest.db"),
+        "CHAT_HISTORY_DB": os.path.join(workdir, "brain.db"),
+        "SCRAPE_CACHE_DIR": os.path.join(workdir, "scrape"),
+        "REPORTS_DIR": os.path.join(workdir, "reports"),
+        "PORTFOLIO_REALTIME": "0",
+        "EMAIL_DIGEST": "false",
+        "EMAIL_BATCH_WINDOW": "0.2",
+        "HUNT_STAGGER_SECONDS": "0",
+        "ARTIFACT_GC_INTERVAL": str(10 ** 9),
+        "TRACE_LOG": "false",
+    })
+    if args.render_workers is not None:
+        os.environ["RENDER_WORKERS"] = str(args.render_workers)
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[k], 4)
+
+def merge_stages(runs: list) -> dict:
+    """Sums the per-stage totals of several trace summaries."""
+    stages = {}
+    for run in runs:
+        for name, s in run["stages"].items():
+            total = stages.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "errors": 0})
+            total["count"] += s["count"]
+            total["total_s"] = round(total["total_s"] + s["total_s"], 4)
+            total["max_s"] = max(total["max_s"], s["max_s"])
+            total["errors"] += s["errors"]
+    for total in stages.values():
+        total["mean_s"] = round(total["total_s"] / max(total["count"], 1), 4)
+    return stages
+
+@contextmanager
+def capture_output(log_path: str):
+    """
+    Points fds 1 and 2 at log_path, so the pipeline's prints and the xhtml2pdf
+    warnings from render workers (separate processes) stay out of the console.
+
+    Yields:
+        file: A handle on the original stdout for progress lines.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    console = os.fdopen(os.dup(1), "w")
+    with open(log_path, "a", encoding="utf-8") as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        try:
+            yield console
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            for fd in saved:
+                os.close(fd)
+            console.close()
+
+def peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+class Bench:
+    def __init__(self, args, stub: StubServer):
+        from app import job_hunter, reporting, resume_agent, telemetry, rendering, agent
+        from app.services.email_service import get_email_service
+        self.args = args
+        self.stub = stub
+        self.job_hunter = job_hunter
+        self.reporting = reporting
+        self.resume_agent = resume_agent
+        self.telemetry = telemetry
+        self.rendering = rendering
+        self.agent = agent
+        self.email_service = get_email_service()
+
+    def measure(self, name: str, fn) -> dict:
+        """Runs one scenario and collects wall clock, stage latencies, tokens and memory."""
+        self.telemetry.recent_runs.clear()
+        stub_before = dict(self.stub.stats)
+        gc.collect()
+        if self.args.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        extra = fn() or {}
+        seconds = round(time.perf_counter() - started, 4)
+        traced_peak = None
+        if self.args.trace_memory:
+            traced_peak = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+            tracemalloc.stop()
+        self.email_service.flush(timeout=30)
+
+        runs = list(self.telemetry.recent_runs)
+        result = {
+            "seconds": seconds,
+            "runs": len(runs),
+            "run_seconds": [r["seconds"] for r in runs],
+            "errors": sum(r["status"] != "ok" for r in runs),
+            "stages": merge_stages(runs),
+            "tokens": {
+                "prompt": sum(r["tokens"]["prompt"] for r in runs),
+                "completion": sum(r["tokens"]["completion"] for r in runs),
+            },
+            "service_calls": {k: v - stub_before.get(k, 0) for k, v in self.stub.stats.items()},
+            "peak_rss_mb": peak_rss_mb(),
+            **extra,
+        }
+        if traced_peak is not None:
+            result["peak_traced_mb"] = traced_peak
+        return result
+
+    # --- Scenarios ---
+
+    def hunt_cold(self) -> dict:
+        # A fresh role per repeat misses the scrape and extraction caches
+        seconds, jobs = [], []
+        for i in range(self.args.repeat):
+            started = time.perf_counter()
+            result = self.job_hunter.run_job_hunt({"role": f"{ROLES[0]} {i}", "location": "Remote", "experience": "Any"})
+            seconds.append(time.perf_counter() - started)
+            jobs.append(len(result["results"]))
+        return {"p50_s": percentile(seconds, 50), "p95_s": percentile(seconds, 95), "jobs": jobs[-1]}
+
+    def hunt_warm(self) -> dict:
+        # Same preferences as the last cold hunt: caches and the artifact store are hot
+        seconds, jobs = [], []
+        for _ in range(self.args.repeat):
+            started = time.perf_counter()
+            result = self.job_hunter.run_job_hunt({"role": f"{ROLES[0]} {self.args.repeat - 1}", "location": "Remote", "experience": "Any"})
+            seconds.append(time.perf_counter() - started)
+            jobs.append(len(result["results"]))
+        return {"p50_s": percentile(seconds, 50), "p95_s": percentile(seconds, 95), "jobs": jobs[-1]}
+
+    def profile_hunts(self) -> dict:
+        profiles = [{"name": f"bench-{i}", "role": f"{ROLES[i % len(ROLES)]} P{i}", "location": "Remote", "experience": "Any", "skills": ["Python"]}
+                    for i in range(self.args.profiles)]
+        started = time.perf_counter()
+        results = self.job_hunter.run_profile_hunts(profiles, stagger_s=0, new_only=False)
+        seconds = time.perf_counter() - started
+        reported = [len(r["result"].get("results", [])) for r in results]
+        return {
+            "profiles": len(profiles),
+            "profiles_per_s": round(len(profiles) / seconds, 3),
+            "jobs_per_s": round(sum(reported) / seconds, 1),
+            "jobs": sum(reported),
+        }
+
+    def resume(self) -> dict:
+        seconds = []
+        for i in range(self.args.resumes):
+            style = "creative" if i % 2 else "harvard"
+            started = time.perf_counter()
+            self.resume_agent.build_resume(JOB_DESCRIPTION, f"Generative AI Engineer {i}", style=style)
+            seconds.append(time.perf_counter() - started)
+        return {"resumes": len(seconds), "p50_s": percentile(seconds, 50), "p95_s": percentile(seconds, 95)}
+
+    def report_render(self) -> dict:
+        # One long report (sliced + merged PDF path) from the recorded jobs
+        recorded = self.stub.fixtures.extract_jobs
+        jobs = [{**recorded[i % len(recorded)], "link": f"{recorded[i % len(recorded)]['link']}?n={i}"}
+                for i in range(self.args.report_jobs)]
+        with self.telemetry.trace_run("report", jobs=len(jobs)):
+            meta = self.reporting.generate_job_report(jobs, {"role": "Benchmark Report", "experience": "Any"})
+        pdf_kb = round(os.path.getsize(meta["pdf_path"]) / 1024, 1) if meta else None
+        return {"jobs": len(jobs), "pdf_kb": pdf_kb}
+
+    def chat(self) -> dict:
+        # One long session: prompt size and first-token latency should not grow with it
+        first_token, prompt_tokens = [], []
+        for i in range(self.args.chat_turns):
+            with self.telemetry.trace_run("chat") as run:
+                started = time.perf_counter()
+                reply = self.agent.stream_chat(f"{CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)]} (turn {i})", "bench")
+                next(reply)
+                first_token.append(time.perf_counter() - started)
+                for _ in reply:
+                    pass
+            prompt_tokens.append(run.tokens["prompt"])
+        self.agent.chat_history.flush(timeout=30)
+        tenth = max(1, len(first_token) // 10)
+        return {
+            "turns": len(first_token),
+            "early_first_token_s": percentile(first_token[:tenth], 50),
+            "late_first_token_s": percentile(first_token[-tenth:], 50),
+            "early_prompt_tokens": percentile(prompt_tokens[:tenth], 50),
+            "late_prompt_tokens": percentile(prompt_tokens[-tenth:], 50),
+            "max_prompt_tokens": max(prompt_tokens),
+            "history": self.agent.chat_history.get_stats(),
+        }
+
+    def run(self, scenarios: list, console=None) -> dict:
+        console = console or sys.stdout
+        self.rendering.warm_templates()
+        # Start the render workers up front so the first scenario doesn't pay for spawning them
+        warmup_pdf = os.path.join(os.environ["REPORTS_DIR"], "warmup.pdf")
+        os.makedirs(os.path.dirname(warmup_pdf), exist_ok=True)
+        self.rendering.render_pdf("resume_template.html", self.stub.fixtures.resume, warmup_pdf)
+        os.remove(warmup_pdf)
+        results = {}
+        for name in scenarios:
+            print(f"▶ {name}...", file=console, flush=True)
+            results[name] = self.measure(name, getattr(self, name))
+            print(f"  {name}: {results[name]['seconds']}s", file=console, flush=True)
+        self.rendering.shutdown_pool()
+        return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Returns:
+        list: (scenario, metric, baseline, current, change) for every metric that got
+        worse by more than `threshold` (a fraction).
+    """
+    regressions = []
+    ignored = ("scenarios", "threshold")
+    differing = sorted(k for k, v in current["meta"]["config"].items()
+                       if k not in ignored and baseline.get("meta", {}).get("config", {}).get(k) != v)
+    if differing:
+        print(f"⚠️ Baseline was run with different settings ({', '.join(differing)}); numbers are not comparable")
+    print(f"\n{'scenario':<15} {'metric':<12} {'baseline':>10} {'current':>10} {'change':>8}")
+    for scenario, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base:
+            continue
+        for metric in COMPARED:
+            if metric not in result or metric not in base or not base[metric]:
+                continue
+            change = (result[metric] - base[metric]) / base[metric]
+            flag = " !" if change > threshold else ""
+            print(f"{scenario:<15} {metric:<12} {base[metric]:>10} {result[metric]:>10} {change:>+7.0%}{flag}")
+            if change > threshold:
+                regressions.append((scenario, metric, base[metric], result[metric], change))
+        if "jobs" in base and result.get("jobs") != base["jobs"]:
+            print(f"⚠️ {scenario}: reported {result.get('jobs')} jobs, baseline reported {base['jobs']}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline JobOs benchmark (hunt, profile hunts, resume, report).")
+    parser.add_argument("--out", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma separated subset of {', '.join(SCENARIOS)}.")
+    parser.add_argument("--repeat", type=int, default=3, help="Hunts per hunt_cold / hunt_warm scenario.")
+    parser.add_argument("--profiles", type=int, default=8, help="Profiles in the profile_hunts scenario.")
+    parser.add_argument("--resumes", type=int, default=4, help="Resumes in the resume scenario.")
+    parser.add_argument("--report-jobs", type=int, default=200, help="Jobs in the report_render scenario.")
+    parser.add_argument("--chat-turns", type=int, default=200, help="Messages in the chat scenario's session.")
+    parser.add_argument("--jina-latency", type=float, default=0.05, help="Stand-in seconds per scraped page.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Stand-in seconds to the first LLM token.")
+    parser.add_argument("--llm-tps", type=float, default=2000, help="Stand-in LLM completion tokens per second.")
+    parser.add_argument("--small-llm-latency", type=float, default=0.05, help="Stand-in seconds to the first token from the small model tier.")
+    parser.add_argument("--small-llm-drop", type=float, default=0.0, help="Share of listings the small model misses (exercises escalation).")
+    parser.add_argument("--render-workers", type=int, default=None, help="Overrides RENDER_WORKERS.")
+    parser.add_argument("--real-limits", action="store_true", help="Keep production per-host rate limits (Groq: 0.5 rps).")
+    parser.add_argument("--trace-memory", action="store_true", help="Also record the tracemalloc peak (slows runs down).")
+    parser.add_argument("--compare", help="Baseline JSON to compare against; exits 1 on regression.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before --compare fails (0.2 = 20%%).")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own logs instead of writing them to the work dir.")
+    parser.add_argument("--keep", action="store_true", help="Keep the work dir (caches, reports, log).")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        print(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        return 2
+
+    stub = StubServer(jina_latency=args.jina_latency, llm_latency=args.llm_latency, llm_tokens_per_s=args.llm_tps,
+                      small_llm_latency=args.small_llm_latency, small_llm_drop=args.small_llm_drop).start()
+    workdir = tempfile.mkdtemp(prefix="jobos-bench-")
+    configure_env(stub, workdir, args)
+    sys.path.insert(0, BACKEND_DIR)
+    log_path = os.path.join(workdir, "bench.log")
+    print(f"🏁 Benchmark: stand-ins at {stub.url}, work dir {workdir}")
+
+    try:
+        with (nullcontext(sys.stdout) if args.verbose else capture_output(log_path)) as console:
+            # app modules read their configuration at import time, so import after configure_env
+            started = time.perf_counter()
+            bench = Bench(args, stub)
+            import_s = round(time.perf_counter() - started, 4)
+            if not args.real_limits:
+                # Measure the pipeline, not the free-tier throttle
+                from app.services import http_client
+                http_client.HOST_LIMITS[stub.netloc] = (1000.0, 1000)
+                http_client.HOST_LIMITS["api.groq.com"] = (1000.0, 1000)
+            results = bench.run(scenarios, console)
+    finally:
+        stub.stop()
+
+    output = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "verbose", "keep")},
+            "import_s": import_s,
+            "children_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        },
+        "scenarios": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"✅ Results written to {args.out}")
+
+    if args.keep:
+        print(f"   Work dir kept: {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(output, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            return 1
+        print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Local stand-ins for the services a hunt or resume run talks to, serving recorded
+fixtures so the pipeline can be benchmarked offline:
+
+- Jina reader:  GET /<target url>                    -> fixtures/pages/<board>.md
+- Groq:         POST /openai/v1/chat/completions     -> replays fixtures/llm/*.json (JSON or SSE)
+- PocketBase:   /api/collections/<name>/records[/id] -> fixtures/pocketbase.json, accepts uploads
+- Brevo:        POST /v3/smtp/email                  -> 201
+
+Every service shares one ThreadingHTTPServer and is routed by path. Latencies are
+configurable so runs stay comparable across machines.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Page fixture per job board (matched against the scraped URL's host)
+PAGE_FIXTURES = {
+    "ycombinator.com": "ycombinator",
+    "remoteok.com": "remoteok",
+    "linkedin.com": "linkedin",
+    "wellfound.com": "wellfound",
+    "weworkremotely.com": "weworkremotely",
+    "flexjobs.com": "flexjobs",
+    "himalayas.app": "himalayas",
+    "workingnomads.com": "workingnomads",
+}
+STREAM_CHUNK_CHARS = 40
+# Model ids treated as the small, fast tier
+SMALL_MODEL_HINTS = ("instant", "8b")
+# Chat replies (about the length of a real answer with a short table) and history summaries
+CHAT_REPLY = (
+    "Here is what I found in your portfolio (benchmark stand-in):\n\n"
+    "| Project | Tech stack | Status |\n| --- | --- | --- |\n"
+    "| JobOs | Python, FastAPI, Groq, PocketBase | Live |\n"
+    "| DocChat | LangChain, FAISS, Streamlit | Archived |\n"
+    "| VisionQC | PyTorch, OpenCV, ONNX | Live |\n\n"
+    "JobOs and DocChat are the closest match for backend LLM roles; VisionQC shows computer vision depth."
+)
+CHAT_SUMMARY = (
+    "The user has been reviewing their portfolio: projects (JobOs, DocChat, VisionQC), certifications, "
+    "recruiters and placement agencies for ML roles. No open questions. (benchmark stand-in)"
+)
+
+
+def _load_json(name: str):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Fixtures:
+    def __init__(self):
+        self.pages = {}
+        pages_dir = os.path.join(FIXTURES_DIR, "pages")
+        for name in os.listdir(pages_dir):
+            if name.endswith(".md"):
+                with open(os.path.join(pages_dir, name), "r", encoding="utf-8") as f:
+                    self.pages[name[:-3]] = f.read()
+        self.extract_jobs = _load_json("llm/extract_jobs.json")
+        self.resume = _load_json("llm/resume.json")
+        self.pocketbase = _load_json("pocketbase.json")
+
+    def page_for(self, target_url: str) -> str:
+        host = (urlparse(target_url).hostname or "").lower()
+        for suffix, name in PAGE_FIXTURES.items():
+            if host == suffix or host.endswith("." + suffix):
+                return self.pages[name]
+        return self.pages["_default"]
+
+    def completion_for(self, prompt: str, drop: float = 0.0) -> str:
+        """
+        Replays the recorded model output that matches the prompt. `drop` leaves out
+        that share of the extracted jobs (a weaker model missing listings).
+        """
+        if "TARGET JOB DESCRIPTION" in prompt:
+            return json.dumps(self.resume, indent=2)
+        if "Extract job listings" in prompt:
+            # Company names are unique across the fixtures, so a recorded job is
+            # returned exactly when its listing is part of this chunk
+            jobs = [j for j in self.extract_jobs if j["company"] in prompt and j["title"] in prompt]
+            return json.dumps(jobs[:round(len(jobs) * (1 - drop))], indent=1)
+        if "EXISTING SUMMARY" in prompt:
+            return CHAT_SUMMARY
+        return CHAT_REPLY
+
+
+class StubServer:
+    """
+    Runs the stand-ins on 127.0.0.1 in a background thread.
+
+    Args:
+        jina_latency (float): Seconds per scraped page.
+        llm_latency (float): Seconds before the first completion token.
+        llm_tokens_per_s (float): Completion speed (0 = instant).
+        pb_latency (float): Seconds per PocketBase / Brevo call.
+        small_llm_latency (float): Seconds before the first token from small models (ids matching SMALL_MODEL_HINTS).
+        small_llm_drop (float): Share of listings small models miss, to exercise escalation.
+    """
+
+    def __init__(self, jina_latency: float = 0.05, llm_latency: float = 0.2, llm_tokens_per_s: float = 2000,
+                 pb_latency: float = 0.005, small_llm_latency: float = 0.05, small_llm_drop: float = 0.0):
+        self.fixtures = Fixtures()
+        self.jina_latency = jina_latency
+        self.llm_latency = llm_latency
+        self.llm_tokens_per_s = llm_tokens_per_s
+        self.pb_latency = pb_latency
+        self.small_llm_latency = small_llm_latency
+        self.small_llm_drop = small_llm_drop
+        self.stats = {"jina": 0, "llm": 0, "llm_small": 0, "llm_stream": 0, "pocketbase": 0, "uploads": 0, "upload_bytes": 0, "emails": 0}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    @property
+    def netloc(self) -> str:
+        return f"127.0.0.1:{self.server.server_port}"
+
+    def count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="bench-stubs", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def completion_delay(self, text: str) -> float:
+        tokens = (len(text) + 3) // 4
+        return tokens / self.llm_tokens_per_s if self.llm_tokens_per_s else 0.0
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _body(self) -> bytes:
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _send(self, status: int, body, content_type: str = "application/json"):
+                if not isinstance(body, (bytes, str)):
+                    body = json.dumps(body)
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path
+                if path.startswith("/http://") or path.startswith("/https://"):
+                    time.sleep(stub.jina_latency)
+                    stub.count("jina")
+                    return self._send(200, stub.fixtures.page_for(path[1:]), "text/plain; charset=utf-8")
+                if path.startswith("/api/health"):
+                    return self._send(200, {"code": 200, "message": "API is healthy."})
+                if path.startswith("/api/collections/"):
+                    return self._pb_list()
+                self._send(404, {"message": "Not found"})
+
+            def do_POST(self):
+                body = self._body()
+                if self.path.startswith("/openai/v1/chat/completions"):
+                    return self._chat(json.loads(body or b"{}"))
+                if self.path.startswith("/api/collections/"):
+                    time.sleep(stub.pb_latency)
+                    stub.count("pocketbase")
+                    stub.count("uploads")
+                    stub.count("upload_bytes", len(body))
+                    collection = self.path.split("/")[3]
+                    return self._send(200, {"id": uuid.uuid4().hex[:15], "collectionName": collection})
+                if self.path.startswith("/v3/smtp/email"):
+                    time.sleep(stub.pb_latency)
+                    payload = json.loads(body or b"{}")
+                    stub.count("emails", len(payload.get("messageVersions") or [1]))
+                    return self._send(201, {"messageId": f"<{uuid.uuid4().hex}@bench>"})
+                self._send(404, {"message": "Not found"})
+
+            def do_DELETE(self):
+                time.sleep(stub.pb_latency)
+                stub.count("pocketbase")
+                self.send_response(204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _pb_list(self):
+                time.sleep(stub.pb_latency)
+                stub.count("pocketbase")
+                parsed = urlparse(self.path)
+                collection = parsed.path.split("/")[3]
+                query = parse_qs(parsed.query)
+                page = int(query.get("page", ["1"])[0])
+                per_page = int(query.get("perPage", ["30"])[0])
+                # Retention sweeps filter on `created`; nothing recorded is that old
+                records = [] if "filter" in query else stub.fixtures.pocketbase.get(collection, [])
+                items = records[(page - 1) * per_page:page * per_page]
+                self._send(200, {"page": page, "perPage": per_page, "totalItems": -1, "totalPages": -1, "items": items})
+
+            def _chat(self, request: dict):
+                stub.count("llm")
+                messages = request.get("messages") or []
+                prompt = "\n".join(m.get("content") or "" for m in messages if isinstance(m.get("content"), str))
+                model = request.get("model", "stub")
+                small = any(hint in model for hint in SMALL_MODEL_HINTS)
+                if small:
+                    stub.count("llm_small")
+                text = stub.fixtures.completion_for(prompt, stub.small_llm_drop if small else 0.0)
+                usage = {
+                    "prompt_tokens": (len(prompt) + 3) // 4,
+                    "completion_tokens": (len(text) + 3) // 4,
+                    "total_tokens": (len(prompt) + len(text) + 6) // 4,
+                }
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+                created = int(time.time())
+                time.sleep(stub.small_llm_latency if small else stub.llm_latency)
+
+                if not request.get("stream"):
+                    time.sleep(stub.completion_delay(text))
+                    return self._send(200, {
+                        "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                     "finish_reason": "stop", "logprobs": None}],
+                        "usage": usage,
+                    })
+
+                stub.count("llm_stream")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                def event(delta: dict, finish=None, extra=None):
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": finish, "logprobs": None}],
+                             **(extra or {})}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+                pause = stub.completion_delay(text) / max(len(pieces), 1)
+                event({"role": "assistant", "content": ""})
+                for piece in pieces:
+                    if pause:
+                        time.sleep(pause)
+                    event({"content": piece})
+                event({}, "stop", {"x_groq": {"id": completion_id, "usage": usage}})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler